@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the position of a row as an opaque cursor string
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor into (created_at, id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def fetch_page(
+    query: Query,
+    count_query: Query,
+    page: int,
+    page_size: int,
+    keyset_filter=None
+) -> Tuple[List, int, bool]:
+    """
+    Fetch one page of an ordered query plus the total row count.
+
+    Without a keyset filter the total is computed alongside the page with
+    COUNT(*) OVER (), so page and total come back in a single round trip.
+    A keyset seek would only count the rows after the cursor, so that path
+    (and an empty page) falls back to count_query.
+
+    Returns (rows, total, has_more).
+    """
+    if keyset_filter is not None:
+        rows = query.filter(keyset_filter).limit(page_size + 1).all()
+        total = count_query.scalar()
+    else:
+        results = query.add_columns(func.count().over()).offset(
+            (page - 1) * page_size
+        ).limit(page_size + 1).all()
+        rows = [result[0] for result in results]
+        total = results[0][1] if results else count_query.scalar()
+
+    return rows[:page_size], total, len(rows) > page_size
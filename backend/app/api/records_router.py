@@ -1,24 +1,77 @@
 """
 Records API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 import csv
 import io
+import operator
 
-from ..models.database import get_db
+from .pagination import encode_cursor, decode_cursor, fetch_page
+from .runs_router import invalidate_run_statistics
+from ..models.database import get_db, SessionLocal
 from ..models.models import Record, Run, Override, RecordStatus, Label
 from ..schemas.schemas import (
     RecordResponse, RecordList, RecordFilter, OverrideCreate, OverrideResponse
 )
 from ..auth import get_current_user
 
+# Handlers are plain `def` so FastAPI runs their blocking SQLAlchemy
+# calls in its threadpool instead of on the event loop
 router = APIRouter()
 
+# Column order for CSV export
+CSV_EXPORT_FIELDNAMES = [
+    'domain', 'label', 'confidence', 'text_score', 'vision_score',
+    'reasons', 'stage_used', 'image_count', 'http_status', 'final_url',
+    'nav_count', 'heading_count', 'error', 'status',
+    'created_at', 'started_at', 'processed_at', 'is_overridden'
+]
+
+
+def _error_filter(column, has_error: bool):
+    return column.isnot(None) if has_error else column.is_(None)
+
+
+# (query parameter, column, comparison) for the optional list_records filters
+_RECORD_FILTERS = [
+    ("label", Record.label, operator.eq),
+    ("status", Record.status, operator.eq),
+    ("min_confidence", Record.confidence, operator.ge),
+    ("max_confidence", Record.confidence, operator.le),
+    ("has_error", Record.error, _error_filter),
+]
+
+
+def _csv_row(record: Record) -> tuple:
+    """Format a record as a CSV row in CSV_EXPORT_FIELDNAMES order"""
+    return (
+        record.domain,
+        record.label.value if record.label else '',
+        record.confidence if record.confidence is not None else '',
+        record.text_score if record.text_score is not None else '',
+        record.vision_score if record.vision_score is not None else '',
+        record.reasons or '',
+        record.stage_used or '',
+        record.image_count,
+        record.http_status if record.http_status is not None else '',
+        record.final_url or '',
+        record.nav_count,
+        record.heading_count,
+        record.error or '',
+        record.status.value,
+        record.created_at.isoformat() if record.created_at else '',
+        record.started_at.isoformat() if record.started_at else '',
+        record.processed_at.isoformat() if record.processed_at else '',
+        record.is_overridden
+    )
+
 
 @router.get("/run/{run_id}", response_model=RecordList)
-async def list_records(
+def list_records(
     run_id: int,
     page: int = 1,
     page_size: int = 50,
@@ -27,52 +80,65 @@ async def list_records(
     min_confidence: Optional[float] = None,
     max_confidence: Optional[float] = None,
     has_error: Optional[bool] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
     """
-    List records for a run with filtering and pagination
+    List records for a run with filtering and pagination.
+
+    Pass the returned next_cursor as `cursor` to fetch the following page
+    without an OFFSET scan (preferred); `page` is kept for compatibility.
     """
     # Check run exists
     run = db.query(Run).filter(Run.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
-    # Build query
-    query = db.query(Record).filter(Record.run_id == run_id)
-
-    # Apply filters
-    if label:
-        query = query.filter(Record.label == label)
-    if status:
-        query = query.filter(Record.status == status)
-    if min_confidence is not None:
-        query = query.filter(Record.confidence >= min_confidence)
-    if max_confidence is not None:
-        query = query.filter(Record.confidence <= max_confidence)
-    if has_error is not None:
-        if has_error:
-            query = query.filter(Record.error.isnot(None))
-        else:
-            query = query.filter(Record.error.is_(None))
-
-    # Get total
-    total = query.count()
+    # Build filters
+    params = {
+        "label": label,
+        "status": status,
+        "min_confidence": min_confidence,
+        "max_confidence": max_confidence,
+        "has_error": has_error,
+    }
+    filters = [Record.run_id == run_id]
+    filters.extend(
+        op(column, params[name])
+        for name, column, op in _RECORD_FILTERS
+        if params[name] is not None
+    )
 
     # Pagination
-    offset = (page - 1) * page_size
-    records = query.order_by(Record.created_at).offset(offset).limit(page_size).all()
+    # is_overridden reads Record.overrides; load them for the whole page in one query
+    query = db.query(Record).options(
+        selectinload(Record.overrides)
+    ).filter(*filters).order_by(Record.created_at, Record.id)
+    keyset_filter = None
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        keyset_filter = or_(
+            Record.created_at > cursor_created_at,
+            and_(Record.created_at == cursor_created_at, Record.id > cursor_id)
+        )
+
+    # Flat COUNT (no wrapping subquery) when the total is not computed with the page
+    count_query = db.query(func.count(Record.id)).filter(*filters)
+    records, total, has_more = fetch_page(query, count_query, page, page_size, keyset_filter)
+    next_cursor = encode_cursor(records[-1].created_at, records[-1].id) if has_more else None
 
     return RecordList(
         records=[RecordResponse.model_validate(record) for record in records],
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/{record_id}", response_model=RecordResponse)
-async def get_record(
+def get_record(
     record_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -88,7 +154,7 @@ async def get_record(
 
 
 @router.post("/{record_id}/override", response_model=OverrideResponse, status_code=status.HTTP_201_CREATED)
-async def create_override(
+def create_override(
     record_id: int,
     override_data: OverrideCreate,
     db: Session = Depends(get_db),
@@ -121,12 +187,13 @@ async def create_override(
     db.add(override)
     db.commit()
     db.refresh(override)
+    invalidate_run_statistics(record.run_id)
 
     return OverrideResponse.model_validate(override)
 
 
 @router.get("/run/{run_id}/export")
-async def export_records_csv(
+def export_records_csv(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -139,46 +206,35 @@ async def export_records_csv(
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
-    # Get all records
-    records = db.query(Record).filter(Record.run_id == run_id).all()
-
-    # Create CSV
-    output = io.StringIO()
-    fieldnames = [
-        'domain', 'label', 'confidence', 'text_score', 'vision_score',
-        'reasons', 'stage_used', 'image_count', 'http_status', 'final_url',
-        'nav_count', 'heading_count', 'error', 'status',
-        'created_at', 'started_at', 'processed_at', 'is_overridden'
-    ]
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-
-    for record in records:
-        writer.writerow({
-            'domain': record.domain,
-            'label': record.label.value if record.label else '',
-            'confidence': record.confidence if record.confidence is not None else '',
-            'text_score': record.text_score if record.text_score is not None else '',
-            'vision_score': record.vision_score if record.vision_score is not None else '',
-            'reasons': record.reasons or '',
-            'stage_used': record.stage_used or '',
-            'image_count': record.image_count,
-            'http_status': record.http_status if record.http_status is not None else '',
-            'final_url': record.final_url or '',
-            'nav_count': record.nav_count,
-            'heading_count': record.heading_count,
-            'error': record.error or '',
-            'status': record.status.value,
-            'created_at': record.created_at.isoformat() if record.created_at else '',
-            'started_at': record.started_at.isoformat() if record.started_at else '',
-            'processed_at': record.processed_at.isoformat() if record.processed_at else '',
-            'is_overridden': record.is_overridden
-        })
-
-    # Return CSV response
-    csv_content = output.getvalue()
-    return Response(
-        content=csv_content,
+    def iter_csv():
+        # Own session: the request-scoped one may be closed before the body
+        # has finished streaming.
+        stream_db = SessionLocal()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        try:
+            writer.writerow(CSV_EXPORT_FIELDNAMES)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+            records = stream_db.query(Record).options(
+                selectinload(Record.overrides)
+            ).filter(
+                Record.run_id == run_id
+            ).order_by(Record.id).execution_options(stream_results=True).yield_per(1000)
+
+            for record in records:
+                writer.writerow(_csv_row(record))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        finally:
+            stream_db.close()
+
+    # Stream CSV response row by row
+    return StreamingResponse(
+        iter_csv(),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=run_{run_id}_results.csv"
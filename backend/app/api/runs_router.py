@@ -2,48 +2,99 @@
 Classification runs API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy import func, or_, and_, select, delete
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import csv
+from typing import Dict, List, Optional, Tuple
 import io
+import threading
+import time
 from datetime import datetime
 
+import pandas as pd
+
+from .pagination import encode_cursor, decode_cursor, fetch_page
 from ..models.database import get_db
-from ..models.models import Run, Record, RunStatus, RecordStatus, Label
+from ..models.models import Run, Record, Override, RunStatus, RecordStatus
 from ..schemas.schemas import (
     RunCreate, RunResponse, RunList, RunStatusResponse,
     RunStatistics, DomainUpload
 )
+from ..services.run_statistics import compute_run_statistics
+from ..services.worker import notify_worker
 from ..auth import get_current_user
 
+# Handlers are plain `def` so FastAPI runs their blocking SQLAlchemy
+# calls in its threadpool instead of on the event loop
 router = APIRouter()
 
 
+# Rows per bulk INSERT when creating records from an upload
+UPLOAD_BATCH_SIZE = 5000
+
+
+# The run detail page polls statistics every few seconds. Results are reused
+# while the run's progress is unchanged (and for at most the TTL, in case
+# records change some other way); overrides invalidate explicitly.
+RUN_STATS_TTL_SECONDS = 30
+RUN_STATS_CACHE_SIZE = 64
+_run_stats_cache: Dict[int, Tuple[float, tuple, RunStatistics]] = {}
+_run_stats_lock = threading.Lock()
+
+
+def invalidate_run_statistics(run_id: int):
+    """Drop cached statistics for a run after its records change"""
+    with _run_stats_lock:
+        _run_stats_cache.pop(run_id, None)
+
+
+def _bulk_insert_records(db: Session, run_id: int, domains: List[str]):
+    """Insert pending records for a run without building ORM instances"""
+    for start in range(0, len(domains), UPLOAD_BATCH_SIZE):
+        db.bulk_insert_mappings(Record, [
+            {"run_id": run_id, "domain": domain, "status": RecordStatus.PENDING}
+            for domain in domains[start:start + UPLOAD_BATCH_SIZE]
+        ])
+
+
 @router.get("/", response_model=RunList)
-async def list_runs(
+def list_runs(
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
     """
-    List all classification runs with pagination
+    List all classification runs with pagination.
+
+    Pass the returned next_cursor as `cursor` to fetch the following page
+    without an OFFSET scan (preferred); `page` is kept for compatibility.
     """
-    offset = (page - 1) * page_size
+    query = db.query(Run).order_by(Run.created_at.desc(), Run.id.desc())
+    keyset_filter = None
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        keyset_filter = or_(
+            Run.created_at < cursor_created_at,
+            and_(Run.created_at == cursor_created_at, Run.id < cursor_id)
+        )
 
-    total = db.query(Run).count()
-    runs = db.query(Run).order_by(Run.created_at.desc()).offset(offset).limit(page_size).all()
+    runs, total, has_more = fetch_page(
+        query, db.query(func.count(Run.id)), page, page_size, keyset_filter
+    )
+    next_cursor = encode_cursor(runs[-1].created_at, runs[-1].id) if has_more else None
 
     return RunList(
         runs=[RunResponse.model_validate(run) for run in runs],
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
 @router.post("/", response_model=RunResponse, status_code=status.HTTP_201_CREATED)
-async def create_run(
+def create_run(
     run_data: RunCreate,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -66,7 +117,7 @@ async def create_run(
 
 
 @router.post("/{run_id}/upload")
-async def upload_domains(
+def upload_domains(
     run_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -88,30 +139,26 @@ async def upload_domains(
 
     # Read CSV
     try:
-        content = await file.read()
-        csv_file = io.StringIO(content.decode('utf-8'))
-        reader = csv.DictReader(csv_file)
-
-        # Find domain column (case-insensitive)
-        fieldnames = reader.fieldnames
-        domain_column = None
-        for field in fieldnames:
-            if field.lower() == 'domain':
-                domain_column = field
-                break
-
-        if not domain_column:
+        content = file.file.read()
+
+        # Parse with pandas' C parser, keeping only the domain column (case-insensitive)
+        df = pd.read_csv(
+            io.BytesIO(content),
+            usecols=lambda column: column.lower() == 'domain',
+            dtype=str,
+            keep_default_na=False,
+            encoding='utf-8'
+        )
+
+        if len(df.columns) == 0:
             raise HTTPException(
                 status_code=400,
                 detail="CSV must contain a 'domain' column"
             )
 
         # Read domains
-        domains = []
-        for row in reader:
-            domain = row.get(domain_column, '').strip()
-            if domain:
-                domains.append(domain)
+        domains = df.iloc[:, 0].dropna().str.strip()
+        domains = domains[domains != ''].tolist()
 
         if not domains:
             raise HTTPException(
@@ -120,17 +167,12 @@ async def upload_domains(
             )
 
         # Create records
-        for domain in domains:
-            record = Record(
-                run_id=run.id,
-                domain=domain,
-                status=RecordStatus.PENDING
-            )
-            db.add(record)
+        _bulk_insert_records(db, run.id, domains)
 
         # Update run
         run.total_records = len(domains)
         db.commit()
+        notify_worker()
 
         return {
             "message": f"Uploaded {len(domains)} domains",
@@ -150,7 +192,7 @@ async def upload_domains(
 
 
 @router.post("/{run_id}/upload-json", response_model=dict)
-async def upload_domains_json(
+def upload_domains_json(
     run_id: int,
     data: DomainUpload,
     db: Session = Depends(get_db),
@@ -171,28 +213,22 @@ async def upload_domains_json(
         )
 
     # Create records
-    for domain in data.domains:
-        domain = domain.strip()
-        if domain:
-            record = Record(
-                run_id=run.id,
-                domain=domain,
-                status=RecordStatus.PENDING
-            )
-            db.add(record)
+    domains = [domain.strip() for domain in data.domains if domain.strip()]
+    _bulk_insert_records(db, run.id, domains)
 
     # Update run
-    run.total_records = len(data.domains)
+    run.total_records = len(domains)
     db.commit()
+    notify_worker()
 
     return {
-        "message": f"Uploaded {len(data.domains)} domains",
-        "total_records": len(data.domains)
+        "message": f"Uploaded {len(domains)} domains",
+        "total_records": len(domains)
     }
 
 
 @router.post("/{run_id}/start", response_model=RunResponse)
-async def start_run(
+def start_run(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -220,12 +256,13 @@ async def start_run(
     run.status = RunStatus.PENDING
     db.commit()
     db.refresh(run)
+    notify_worker()
 
     return RunResponse.model_validate(run)
 
 
 @router.get("/{run_id}", response_model=RunResponse)
-async def get_run(
+def get_run(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -241,7 +278,7 @@ async def get_run(
 
 
 @router.get("/{run_id}/status", response_model=RunStatusResponse)
-async def get_run_status(
+def get_run_status(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -249,7 +286,11 @@ async def get_run_status(
     """
     Get run status with ETA
     """
-    run = db.query(Run).filter(Run.id == run_id).first()
+    # Only the columns needed here - this endpoint is polled continuously
+    run = db.query(
+        Run.id, Run.name, Run.status, Run.total_records, Run.processed_records,
+        Run.progress_percentage, Run.created_at, Run.started_at, Run.completed_at
+    ).filter(Run.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -278,7 +319,7 @@ async def get_run_status(
 
 
 @router.get("/{run_id}/statistics", response_model=RunStatistics)
-async def get_run_statistics(
+def get_run_statistics(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -290,50 +331,24 @@ async def get_run_statistics(
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
-    records = db.query(Record).filter(Record.run_id == run_id).all()
-
-    # Count by status
-    completed_records = sum(1 for r in records if r.status == RecordStatus.COMPLETED)
-    error_records = sum(1 for r in records if r.status == RecordStatus.ERROR)
-
-    # Count by label
-    label_distribution = {}
-    for label in Label:
-        count = sum(1 for r in records if r.label == label)
-        if count > 0:
-            label_distribution[label.value] = count
-
-    # Count by stage
-    stage_distribution = {}
-    for record in records:
-        if record.stage_used:
-            stage_distribution[record.stage_used] = stage_distribution.get(record.stage_used, 0) + 1
-
-    # Calculate average confidence
-    confidences = [r.confidence for r in records if r.confidence is not None]
-    average_confidence = sum(confidences) / len(confidences) if confidences else None
-
-    # Calculate average processing time
-    processing_times = []
-    for record in records:
-        if record.started_at and record.processed_at:
-            duration = (record.processed_at - record.started_at).total_seconds()
-            processing_times.append(duration)
-    average_processing_time = sum(processing_times) / len(processing_times) if processing_times else None
-
-    return RunStatistics(
-        total_records=run.total_records,
-        completed_records=completed_records,
-        error_records=error_records,
-        label_distribution=label_distribution,
-        stage_distribution=stage_distribution,
-        average_confidence=average_confidence,
-        average_processing_time_seconds=average_processing_time
-    )
+    fingerprint = (run.status, run.total_records, run.processed_records)
+    with _run_stats_lock:
+        entry = _run_stats_cache.get(run_id)
+    if entry and entry[1] == fingerprint and time.monotonic() - entry[0] < RUN_STATS_TTL_SECONDS:
+        return entry[2]
+
+    statistics = compute_run_statistics(db, run)
+
+    with _run_stats_lock:
+        if run_id not in _run_stats_cache and len(_run_stats_cache) >= RUN_STATS_CACHE_SIZE:
+            _run_stats_cache.pop(next(iter(_run_stats_cache)))
+        _run_stats_cache[run_id] = (time.monotonic(), fingerprint, statistics)
+
+    return statistics
 
 
 @router.delete("/{run_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_run(
+def delete_run(
     run_id: int,
     db: Session = Depends(get_db),
     _: dict = Depends(get_current_user)
@@ -351,7 +366,12 @@ async def delete_run(
             detail="Cannot delete a running run"
         )
 
-    db.delete(run)
+    # Set-based deletes instead of ORM cascade, which loads every child row first
+    record_ids = select(Record.id).where(Record.run_id == run_id)
+    db.execute(delete(Override).where(Override.record_id.in_(record_ids)))
+    db.execute(delete(Record).where(Record.run_id == run_id))
+    db.execute(delete(Run).where(Run.id == run_id))
     db.commit()
+    invalidate_run_statistics(run_id)
 
     return None
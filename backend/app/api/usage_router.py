@@ -2,9 +2,12 @@
 API endpoints for usage tracking and statistics
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import time
 
 from ..models.database import get_db
 from ..models.models import ApiUsage, ApiProvider
@@ -13,6 +16,20 @@ from ..auth import get_current_user
 
 router = APIRouter(prefix="/api/usage", tags=["usage"])
 
+# Dashboards poll usage statistics; share one result per `days` for a short window
+USAGE_STATS_TTL_SECONDS = 30
+USAGE_STATS_CACHE_SIZE = 16
+_usage_stats_cache: Dict[int, Tuple[float, dict]] = {}
+_usage_stats_lock = asyncio.Lock()
+
+
+def _cached_usage_statistics(days: int) -> Optional[dict]:
+    """Return cached statistics for `days` if still fresh"""
+    entry = _usage_stats_cache.get(days)
+    if entry and time.monotonic() - entry[0] < USAGE_STATS_TTL_SECONDS:
+        return entry[1]
+    return None
+
 
 @router.get("/statistics")
 async def get_usage_statistics(
@@ -30,8 +47,21 @@ async def get_usage_statistics(
         Usage statistics including call counts and estimated costs
     """
     try:
-        stats = ApiTracker.get_usage_statistics(db, days=days)
-        return stats
+        cached = _cached_usage_statistics(days)
+        if cached is not None:
+            return cached
+
+        # Concurrent pollers wait for one query instead of each running it
+        async with _usage_stats_lock:
+            cached = _cached_usage_statistics(days)
+            if cached is not None:
+                return cached
+
+            stats = await run_in_threadpool(ApiTracker.get_usage_statistics, db, days)
+            if len(_usage_stats_cache) >= USAGE_STATS_CACHE_SIZE:
+                _usage_stats_cache.pop(next(iter(_usage_stats_cache)))
+            _usage_stats_cache[days] = (time.monotonic(), stats)
+            return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving statistics: {str(e)}")
 
@@ -4,12 +4,28 @@ Authentication middleware and utilities
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timedelta
+from functools import lru_cache
+import calendar
+import hashlib
+import hmac
+import json
+import time
 import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
 from .config import settings
 
 
 security = HTTPBearer()
 
+# Digest of the configured password, compared in constant time on login
+_PASSWORD_HASH = hashlib.sha256(settings.AUTH_PASSWORD.encode("utf-8")).digest()
+
+# HS256 signing state, prepared once instead of on every token issued
+_HS256 = get_default_algorithms()["HS256"]
+_SIGNING_KEY = _HS256.prepare_key(settings.AUTH_TOKEN_SECRET)
+_JWT_HEADER_SEGMENT = base64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
 
 def create_access_token(data: dict) -> str:
     """
@@ -17,20 +33,45 @@ def create_access_token(data: dict) -> str:
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=settings.AUTH_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.AUTH_TOKEN_SECRET,
-        algorithm="HS256"
+    to_encode.update({"exp": calendar.timegm(expire.utctimetuple())})
+
+    # Same output as jwt.encode(..., algorithm="HS256") using the
+    # precomputed header and key
+    payload_segment = base64url_encode(
+        json.dumps(to_encode, separators=(",", ":")).encode("utf-8")
     )
-    return encoded_jwt
+    signing_input = _JWT_HEADER_SEGMENT + b"." + payload_segment
+    signature = _HS256.sign(signing_input, _SIGNING_KEY)
+    return (signing_input + b"." + base64url_encode(signature)).decode("ascii")
 
 
 def verify_password(password: str) -> bool:
     """
     Verify password against configured password
     """
-    return password == settings.AUTH_PASSWORD
+    candidate_hash = hashlib.sha256(password.encode("utf-8")).digest()
+    return hmac.compare_digest(_PASSWORD_HASH, candidate_hash)
+
+
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> dict:
+    """
+    Verify and decode a JWT. Results are cached per raw token string so
+    repeated requests with the same bearer token skip HMAC verification.
+    """
+    return jwt.decode(
+        token,
+        settings.AUTH_TOKEN_SECRET,
+        algorithms=["HS256"]
+    )
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
@@ -38,24 +79,17 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
     Verify JWT token and return payload
     """
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.AUTH_TOKEN_SECRET,
-            algorithms=["HS256"]
-        )
-        return payload
+        payload = _decode_token(credentials.credentials)
     except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Token has expired")
     except jwt.InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Invalid token")
+
+    # Cached payloads bypass PyJWT's expiry check, so repeat it here
+    if payload.get("exp") is not None and payload["exp"] < time.time():
+        raise _unauthorized("Token has expired")
+
+    return dict(payload)
 
 
 # Dependency for protected routes
@@ -27,6 +27,7 @@ class Settings(BaseSettings):
 
     # Worker settings
     WORKER_POLL_INTERVAL_SECONDS: int = 2
+    WORKER_CONCURRENCY: int = 4  # Domains classified at once within a run
     WORKER_ENABLED: bool = True
 
     # Classification settings
@@ -3,18 +3,40 @@ Main FastAPI application
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from typing import Any
 import asyncio
+import orjson
 
 from .config import settings
-from .models.database import init_db
+from .models.database import init_db, checkpoint_if_needed, WAL_CHECKPOINT_INTERVAL_SECONDS
 from .services.worker import Worker
+from .services.api_tracker import ApiTracker
 
 
 # Global worker instance
 worker_instance: Worker = None
 
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def wal_checkpoint_loop():
+    """Periodically checkpoint the SQLite WAL so it cannot grow without bound"""
+    while True:
+        await asyncio.sleep(WAL_CHECKPOINT_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(checkpoint_if_needed)
+        except Exception as e:
+            print(f"⚠️  WAL checkpoint failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -31,6 +53,7 @@ async def lifespan(app: FastAPI):
     print("📊 Initializing database...")
     init_db()
     print("✅ Database initialized")
+    checkpoint_task = asyncio.create_task(wal_checkpoint_loop())
 
     # Start background worker
     if settings.WORKER_ENABLED:
@@ -59,6 +82,11 @@ async def lifespan(app: FastAPI):
         await worker_instance.stop()
         print("✅ Background worker stopped")
 
+    checkpoint_task.cancel()
+
+    # Write any API usage rows still queued for the background writer
+    ApiTracker.flush()
+
     print("👋 Shutdown complete")
 
 
@@ -67,7 +95,8 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Internal tool for automated brand classification",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -1,8 +1,10 @@
 """
 SQLAlchemy models for classification runs, records, and overrides
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum, Index, case, cast, func
+)
+from sqlalchemy.orm import relationship, column_property
 from datetime import datetime
 import enum
 from .database import Base
@@ -45,6 +47,10 @@ class Run(Base):
     Classification run - represents a batch of domains to be classified
     """
     __tablename__ = "runs"
+    __table_args__ = (
+        # Keyset pagination over runs, newest first (list_runs)
+        Index("ix_run_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -62,12 +68,13 @@ class Run(Base):
     # Relationships
     records = relationship("Record", back_populates="run", cascade="all, delete-orphan")
 
-    @property
-    def progress_percentage(self):
-        """Calculate progress percentage"""
-        if self.total_records == 0:
-            return 0
-        return (self.processed_records / self.total_records) * 100
+    # Progress percentage, computed by the database when the run is loaded
+    progress_percentage = column_property(
+        case(
+            (func.coalesce(total_records, 0) == 0, 0.0),
+            else_=cast(processed_records, Float) * 100 / total_records
+        )
+    )
 
     @property
     def is_active(self):
@@ -80,6 +87,12 @@ class Record(Base):
     Individual domain classification record
     """
     __tablename__ = "records"
+    __table_args__ = (
+        # Ordered pagination within a run (list_records)
+        Index("ix_record_run_created", "run_id", "created_at"),
+        # Status/label filters and GROUP BYs within a run (list_records, statistics)
+        Index("ix_record_run_status_label", "run_id", "status", "label"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(Integer, ForeignKey("runs.id"), nullable=False, index=True)
@@ -115,7 +128,12 @@ class Record(Base):
 
     # Relationships
     run = relationship("Run", back_populates="records")
-    overrides = relationship("Override", back_populates="record", cascade="all, delete-orphan")
+    # Loaded with one SELECT ... IN per batch of records rather than one per record,
+    # since serializing a record reads is_overridden. Newest first.
+    overrides = relationship(
+        "Override", back_populates="record", cascade="all, delete-orphan", lazy="selectin",
+        order_by="Override.created_at.desc()"
+    )
 
     @property
     def is_overridden(self):
@@ -125,9 +143,7 @@ class Record(Base):
     @property
     def current_override(self):
         """Get the most recent override if any"""
-        if self.overrides:
-            return sorted(self.overrides, key=lambda o: o.created_at, reverse=True)[0]
-        return None
+        return self.overrides[0] if self.overrides else None
 
 
 class Override(Base):
@@ -156,11 +172,18 @@ class ApiUsage(Base):
     Track external API usage for monitoring and cost management
     """
     __tablename__ = "api_usage"
+    __table_args__ = (
+        # Date-range scans grouped by provider (usage statistics, daily breakdown)
+        Index("ix_api_usage_created_provider", "created_at", "provider"),
+        # Per-provider date ranges (usage history filtered by provider);
+        # also serves provider-only lookups
+        Index("ix_api_usage_provider_created", "provider", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # API details
-    provider = Column(Enum(ApiProvider), nullable=False, index=True)
+    provider = Column(Enum(ApiProvider), nullable=False)
     operation = Column(String(100), nullable=False)  # e.g., "vision_api", "scrape"
 
     # Association
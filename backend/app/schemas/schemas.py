@@ -60,6 +60,7 @@ class RunList(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 # Record schemas
@@ -95,6 +96,7 @@ class RecordList(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class RecordFilter(BaseModel):
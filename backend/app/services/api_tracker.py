@@ -2,14 +2,78 @@
 API usage tracking utility
 """
 import logging
-from typing import Optional
+import queue
+import threading
+import time
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from ..models.models import ApiUsage, ApiProvider
-from ..models.database import SessionLocal
+from ..models.database import engine
 
 logger = logging.getLogger(__name__)
 
+# Usage rows are written by one background thread in batches, so tracking
+# an API call never opens a session or waits on a commit in the caller
+WRITER_BATCH_SIZE = 100
+WRITER_FLUSH_INTERVAL_SECONDS = 0.2
+
+_writer_queue: "queue.Queue[dict]" = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_thread_lock = threading.Lock()
+
+
+def _write_usage_batch(items: List[dict]):
+    """Insert a batch of usage rows in one transaction"""
+    # Core INSERT on a short-lived transaction - no Session or unit of work.
+    # Every row carries the same keys, so the batch is a single executemany.
+    try:
+        with engine.begin() as conn:
+            conn.execute(ApiUsage.__table__.insert(), items)
+    except Exception as e:
+        logger.error(f"Failed to track {len(items)} API usage rows: {e}")
+
+
+def _writer_loop():
+    """Drain the queue, flushing every WRITER_BATCH_SIZE rows or flush interval"""
+    while True:
+        items = [_writer_queue.get()]
+        deadline = time.monotonic() + WRITER_FLUSH_INTERVAL_SECONDS
+        while len(items) < WRITER_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(_writer_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _write_usage_batch(items)
+        finally:
+            # Lets flush() wait until rows held in `items` are written too
+            for _ in items:
+                _writer_queue.task_done()
+
+
+def _truncate(text: Optional[str], limit: int = 500) -> Optional[str]:
+    """Cap a stored error message at `limit` characters (short ones are not copied)"""
+    if not text:
+        return None
+    return text if len(text) <= limit else text[:limit]
+
+
+def _enqueue_usage(row: dict):
+    """Queue a usage row for the background writer, starting it on first use"""
+    global _writer_thread
+    if _writer_thread is None:
+        with _writer_thread_lock:
+            if _writer_thread is None:
+                _writer_thread = threading.Thread(
+                    target=_writer_loop, name="api-usage-writer", daemon=True
+                )
+                _writer_thread.start()
+    _writer_queue.put(row)
+
 
 class ApiTracker:
     """Track API usage for monitoring and cost management"""
@@ -38,32 +102,21 @@ class ApiTracker:
             tokens_used: Number of tokens used (if available)
             image_count: Number of images analyzed
         """
-        db = SessionLocal()
-        try:
-            # Estimate cost based on image count
-            estimated_cost = ApiTracker.OPENAI_VISION_COST_PER_IMAGE * image_count
-
-            usage = ApiUsage(
-                provider=ApiProvider.OPENAI,
-                operation="vision_api",
-                record_id=record_id,
-                run_id=run_id,
-                success=1 if success else 0,
-                error_message=error_message[:500] if error_message else None,
-                tokens_used=tokens_used,
-                estimated_cost=estimated_cost
-            )
-
-            db.add(usage)
-            db.commit()
-
-            logger.debug(f"Tracked OpenAI Vision API call: success={success}, cost=${estimated_cost:.4f}")
-
-        except Exception as e:
-            logger.error(f"Failed to track OpenAI API usage: {e}")
-            db.rollback()  # CRITICAL FIX: Rollback on error
-        finally:
-            db.close()  # CRITICAL FIX: Always close session
+        # Estimate cost based on image count
+        estimated_cost = ApiTracker.OPENAI_VISION_COST_PER_IMAGE * image_count
+
+        _enqueue_usage({
+            'provider': ApiProvider.OPENAI,
+            'operation': "vision_api",
+            'record_id': record_id,
+            'run_id': run_id,
+            'success': 1 if success else 0,
+            'error_message': _truncate(error_message),
+            'tokens_used': tokens_used,
+            'estimated_cost': estimated_cost
+        })
+
+        logger.debug(f"Tracked OpenAI Vision API call: success={success}, cost=${estimated_cost:.4f}")
 
     @staticmethod
     def track_firecrawl(
@@ -81,28 +134,27 @@ class ApiTracker:
             success: Whether the API call succeeded
             error_message: Error message if failed
         """
-        db = SessionLocal()
-        try:
-            usage = ApiUsage(
-                provider=ApiProvider.FIRECRAWL,
-                operation="scrape",
-                record_id=record_id,
-                run_id=run_id,
-                success=1 if success else 0,
-                error_message=error_message[:500] if error_message else None,
-                estimated_cost=ApiTracker.FIRECRAWL_COST_PER_SCRAPE
-            )
-
-            db.add(usage)
-            db.commit()
-
-            logger.debug(f"Tracked Firecrawl API call: success={success}, cost=${ApiTracker.FIRECRAWL_COST_PER_SCRAPE:.4f}")
-
-        except Exception as e:
-            logger.error(f"Failed to track Firecrawl API usage: {e}")
-            db.rollback()  # CRITICAL FIX: Rollback on error
-        finally:
-            db.close()  # CRITICAL FIX: Always close session
+        _enqueue_usage({
+            'provider': ApiProvider.FIRECRAWL,
+            'operation': "scrape",
+            'record_id': record_id,
+            'run_id': run_id,
+            'success': 1 if success else 0,
+            'error_message': _truncate(error_message),
+            'tokens_used': None,
+            'estimated_cost': ApiTracker.FIRECRAWL_COST_PER_SCRAPE
+        })
+
+        logger.debug(f"Tracked Firecrawl API call: success={success}, cost=${ApiTracker.FIRECRAWL_COST_PER_SCRAPE:.4f}")
+
+    @staticmethod
+    def flush():
+        """
+        Block until every queued usage row has been written (call on shutdown).
+        """
+        # Rows are only queued once the writer thread is running
+        if _writer_thread is not None:
+            _writer_queue.join()
 
     @staticmethod
     def get_usage_statistics(db: Session, days: int = 30) -> dict:
@@ -140,37 +192,30 @@ class ApiTracker:
             'period_days': days
         }
 
-        # OpenAI stats
-        openai_usage = db.query(ApiUsage).filter(
-            ApiUsage.provider == ApiProvider.OPENAI,
-            ApiUsage.created_at >= cutoff_date
-        ).all()
-
-        for usage in openai_usage:
-            stats['openai']['total_calls'] += 1
-            if usage.success:
-                stats['openai']['successful_calls'] += 1
-            else:
-                stats['openai']['failed_calls'] += 1
-            if usage.estimated_cost:
-                stats['openai']['total_cost'] += usage.estimated_cost
-            if usage.tokens_used:
-                stats['openai']['total_tokens'] += usage.tokens_used
-
-        # Firecrawl stats
-        firecrawl_usage = db.query(ApiUsage).filter(
-            ApiUsage.provider == ApiProvider.FIRECRAWL,
+        # One grouped pass: at most one row per (provider, success)
+        rows = db.query(
+            ApiUsage.provider,
+            ApiUsage.success,
+            func.count(ApiUsage.id).label('n'),
+            func.sum(ApiUsage.estimated_cost).label('cost'),
+            func.sum(ApiUsage.tokens_used).label('tokens')
+        ).filter(
             ApiUsage.created_at >= cutoff_date
+        ).group_by(
+            ApiUsage.provider,
+            ApiUsage.success
         ).all()
 
-        for usage in firecrawl_usage:
-            stats['firecrawl']['total_calls'] += 1
-            if usage.success:
-                stats['firecrawl']['successful_calls'] += 1
+        for row in rows:
+            provider_stats = stats[row.provider.value]
+            provider_stats['total_calls'] += row.n
+            if row.success:
+                provider_stats['successful_calls'] += row.n
             else:
-                stats['firecrawl']['failed_calls'] += 1
-            if usage.estimated_cost:
-                stats['firecrawl']['total_cost'] += usage.estimated_cost
+                provider_stats['failed_calls'] += row.n
+            provider_stats['total_cost'] += row.cost or 0.0
+            if 'total_tokens' in provider_stats:
+                provider_stats['total_tokens'] += row.tokens or 0
 
         # Total cost
         stats['total_cost'] = stats['openai']['total_cost'] + stats['firecrawl']['total_cost']
@@ -2,19 +2,281 @@
 Feature extraction from web pages.
 """
 import asyncio
+import functools
 import json
 import logging
+import os
 import re
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 from langdetect import detect, LangDetectException
+from langdetect.detector_factory import DetectorFactory, PROFILES_DIRECTORY
 from playwright.async_api import Page
 
 logger = logging.getLogger(__name__)
 
 
+def _compile_terms(terms_by_lang: Dict[str, List[str]]) -> Tuple[re.Pattern, List[Tuple[str, str, str]]]:
+    """
+    Compile every term of a dictionary into one word-bounded alternation.
+
+    Returns the pattern and the (lang, term, lowercased term) entries in
+    dictionary order; findall() on the pattern reports lowercased terms.
+    Every fetcher lowercases the text it extracts, so the pattern is
+    compiled case-sensitive rather than with re.IGNORECASE.
+    """
+    entries = [(lang, term, term.lower()) for lang, terms in terms_by_lang.items() for term in terms]
+    if not entries:
+        return re.compile(r'(?!)'), entries
+
+    # Longest first, so a multi-word term wins over a shorter term it starts with
+    keys = sorted({key for _, _, key in entries}, key=len, reverse=True)
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(key) for key in keys) + r')\b')
+    return pattern, entries
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dictionaries(path: str) -> Dict:
+    """Parse a dictionaries file once per process; callers must not mutate it."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def _language_detector(langs: Tuple[str, ...]) -> Optional[DetectorFactory]:
+    """
+    Build a langdetect factory holding only the given languages' profiles.
+
+    The stock detect() loads all 55 n-gram profiles (tens of MB) on first
+    use. Returns None if fewer than two profiles are available, in which
+    case callers fall back to the stock detector.
+    """
+    profiles = []
+    for lang in langs:
+        path = os.path.join(PROFILES_DIRECTORY, lang)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                profiles.append(f.read())
+
+    if len(profiles) < 2:
+        return None
+
+    factory = DetectorFactory()
+    factory.load_json_profile(profiles)
+    return factory
+
+
+@functools.lru_cache(maxsize=1024)
+def _langdetect_language(text: str, langs: Tuple[str, ...]) -> str:
+    """
+    Detect the language of text with langdetect, restricted to langs.
+
+    Memoized because templated sites and retries produce identical nav text;
+    this also keeps langdetect's randomized sampling stable per text.
+    Unsupported or undetectable languages map to 'en'.
+    """
+    try:
+        factory = _language_detector(langs)
+        if factory is None:
+            lang = detect(text)
+        else:
+            detector = factory.create()
+            detector.append(text)
+            lang = detector.detect()
+        # Map to our supported languages
+        if lang in langs:
+            return lang
+        return 'en'  # Default to English
+    except LangDetectException:
+        return 'en'
+
+
+# Page-side extractors (JS function expressions). They run together in a
+# single page.evaluate round trip via _EXTRACT_ALL_JS.
+_NAVIGATION_JS = '''
+() => {
+    const navTexts = new Set();
+    const navLinks = new Set();
+
+    // Common nav selectors
+    const navSelectors = [
+        'nav', 'header nav', '[role="navigation"]',
+        '.nav', '.navigation', '.menu', '.main-menu',
+        '#nav', '#navigation', '#menu'
+    ];
+
+    // A Set, since selectors overlap ('nav' and 'header nav')
+    const navElements = new Set();
+    for (const selector of navSelectors) {
+        const elements = document.querySelectorAll(selector);
+        elements.forEach(el => navElements.add(el));
+    }
+
+    // Extract text and links from nav elements
+    navElements.forEach(nav => {
+        // Get all links
+        const links = nav.querySelectorAll('a');
+        links.forEach(link => {
+            const text = link.textContent.trim();
+            const href = link.href;
+
+            if (text && text.length > 1 && text.length < 100) {
+                navTexts.add(text.toLowerCase());
+            }
+            if (href && href.startsWith('http')) {
+                navLinks.add(href);
+            }
+        });
+    });
+
+    return {
+        text: [...navTexts],
+        links: [...navLinks]
+    };
+}
+'''
+
+_HERO_TEXT_JS = '''
+() => {
+    const texts = new Set();
+
+    // Hero section selectors
+    const heroSelectors = [
+        '.hero', '.banner', '.jumbotron',
+        '[class*="hero"]', '[class*="banner"]',
+        'section:first-of-type'
+    ];
+
+    const heroElements = [];
+    for (const selector of heroSelectors) {
+        const elements = document.querySelectorAll(selector);
+        elements.forEach(el => heroElements.push(el));
+        if (heroElements.length > 0) break;
+    }
+
+    // Extract h1-h3 and prominent text
+    heroElements.forEach(hero => {
+        const headings = hero.querySelectorAll('h1, h2, h3');
+        headings.forEach(h => {
+            const text = h.textContent.trim();
+            if (text && text.length > 3) {
+                texts.add(text.toLowerCase());
+            }
+        });
+    });
+
+    return [...texts];
+}
+'''
+
+_CTA_TEXT_JS = '''
+() => {
+    const texts = new Set();
+
+    // Find buttons and prominent links
+    const buttons = document.querySelectorAll(
+        'button, a.button, a.btn, [role="button"], .cta'
+    );
+
+    buttons.forEach(btn => {
+        const text = btn.textContent.trim();
+        if (text && text.length > 2 && text.length < 50) {
+            texts.add(text.toLowerCase());
+        }
+    });
+
+    return [...texts];
+}
+'''
+
+_IMAGES_JS = '''
+() => {
+    const images = [];
+    const seenUrls = new Set();
+
+    // Strategy 1: Regular img tags
+    const imgElements = document.querySelectorAll('img');
+    imgElements.forEach(img => {
+        const width = img.naturalWidth || img.width || img.offsetWidth;
+        const height = img.naturalHeight || img.height || img.offsetHeight;
+
+        if (width >= 150 && height >= 150) {
+            // Try multiple attributes for lazy-loaded images
+            const src = img.src || img.dataset.src || img.dataset.lazySrc ||
+                       img.dataset.original || img.getAttribute('data-lazy-src');
+
+            if (src && (src.startsWith('http') || src.startsWith('//'))) {
+                const fullSrc = src.startsWith('//') ? 'https:' + src : src;
+                if (!seenUrls.has(fullSrc)) {
+                    seenUrls.add(fullSrc);
+                    images.push({
+                        url: fullSrc,
+                        width: width,
+                        height: height
+                    });
+                }
+            }
+        }
+    });
+
+    // Strategy 2: Background images
+    const divs = document.querySelectorAll('div, section, a');
+    divs.forEach(el => {
+        const style = window.getComputedStyle(el);
+        const bgImage = style.backgroundImage;
+
+        if (bgImage && bgImage !== 'none') {
+            const match = bgImage.match(/url\\(["']?([^"')]+)["']?\\)/);
+            if (match && match[1]) {
+                const src = match[1];
+                if (src.startsWith('http') || src.startsWith('//')) {
+                    const fullSrc = src.startsWith('//') ? 'https:' + src : src;
+                    if (!seenUrls.has(fullSrc)) {
+                        seenUrls.add(fullSrc);
+                        const rect = el.getBoundingClientRect();
+                        if (rect.width >= 150 && rect.height >= 150) {
+                            images.push({
+                                url: fullSrc,
+                                width: rect.width,
+                                height: rect.height
+                            });
+                        }
+                    }
+                }
+            }
+        }
+    });
+
+    // Sort by size
+    images.sort((a, b) => (b.width * b.height) - (a.width * a.height));
+
+    return images.slice(0, 8).map(img => img.url);
+}
+'''
+
+# Each extractor is isolated so one failing still returns the others' results
+_EXTRACT_ALL_JS = '''
+() => {
+    const run = (extract, fallback) => {
+        try {
+            return extract();
+        } catch (e) {
+            return fallback;
+        }
+    };
+    return {
+        nav: run(''' + _NAVIGATION_JS + ''', {text: [], links: []}),
+        hero: run(''' + _HERO_TEXT_JS + ''', []),
+        cta: run(''' + _CTA_TEXT_JS + ''', []),
+        images: run(''' + _IMAGES_JS + ''', [])
+    };
+}
+'''
+
+
 class FeatureExtractor:
     """Extract text and image features from web pages."""
 
@@ -25,12 +287,18 @@ class FeatureExtractor:
         # Load dictionaries - use absolute path relative to this file
         base_dir = Path(__file__).parent.parent.parent.parent
         dict_path = base_dir / "config" / "dictionaries.json"
-        with open(dict_path, 'r') as f:
-            dicts = json.load(f)
+        dicts = _load_dictionaries(str(dict_path))
 
         self.bodywear_terms = dicts['bodywear_terms']
         self.generalist_terms = dicts['generalist_penalty_terms']
 
+        # Languages we have dictionaries for (and load detection profiles for)
+        self._supported_langs = tuple(sorted(self.bodywear_terms))
+
+        # One precompiled pattern per dictionary instead of a regex per term
+        self._bodywear_pattern, self._bodywear_entries = _compile_terms(self.bodywear_terms)
+        self._generalist_pattern, self._generalist_entries = _compile_terms(self.generalist_terms)
+
     async def extract_all_features(self, page: Page, domain: str, capture_screenshot: bool = True) -> Dict:
         """
         Extract all features from a page.
@@ -55,272 +323,75 @@ class FeatureExtractor:
         }
 
         try:
-            # Capture screenshot FIRST, immediately while page is definitely still open
+            # Scroll to trigger lazy loading (ends back at the top of the page)
+            await self._trigger_lazy_loading(page)
+
+            # Extract navigation, hero text, CTA buttons and images in one round
+            # trip, overlapped with the screenshot capture
+            jobs = [page.evaluate(_EXTRACT_ALL_JS)]
             if capture_screenshot and not page.is_closed():
-                try:
-                    features['screenshot_bytes'] = await page.screenshot(
-                        type='jpeg',
-                        quality=70,
-                        full_page=False
-                    )
+                jobs.append(page.screenshot(type='jpeg', quality=50, full_page=False))
+            extracted, *screenshot = await asyncio.gather(*jobs, return_exceptions=True)
+
+            if screenshot:
+                if isinstance(screenshot[0], Exception):
+                    logger.debug(f"Failed to capture screenshot for {domain}: {screenshot[0]}")
+                else:
+                    features['screenshot_bytes'] = screenshot[0]
                     logger.debug(f"Screenshot captured for {domain}: {len(features['screenshot_bytes'])} bytes")
-                except Exception as e:
-                    logger.debug(f"Failed to capture screenshot for {domain}: {e}")
+            if isinstance(extracted, Exception):
+                raise extracted
 
-            # Extract navigation text and links
-            nav_data = await self._extract_navigation(page)
-            features['nav_text'] = nav_data['text']
-            features['nav_links'] = nav_data['links']
-
-            # Extract hero section text
-            features['hero_text'] = await self._extract_hero_text(page)
-
-            # Extract CTA buttons
-            features['cta_text'] = await self._extract_cta_text(page)
+            features['nav_text'] = extracted['nav']['text']
+            features['nav_links'] = extracted['nav']['links']
+            features['hero_text'] = extracted['hero']
+            features['cta_text'] = extracted['cta']
+            features['image_urls'] = extracted['images']
 
             # Detect language from combined text
             all_text = ' '.join(features['nav_text'] + features['hero_text'])
             features['detected_language'] = self._detect_language(all_text)
 
-            # Extract images
-            features['image_urls'] = await self._extract_images(page, domain)
-
         except Exception as e:
             logger.error(f"Error extracting features for {domain}: {e}")
 
         return features
 
-    async def _extract_navigation(self, page: Page) -> Dict[str, List]:
-        """Extract navigation menu text and links."""
-        nav_data = {'text': [], 'links': []}
-
-        try:
-            result = await page.evaluate('''
-                () => {
-                    const navTexts = [];
-                    const navLinks = [];
-
-                    // Common nav selectors
-                    const navSelectors = [
-                        'nav', 'header nav', '[role="navigation"]',
-                        '.nav', '.navigation', '.menu', '.main-menu',
-                        '#nav', '#navigation', '#menu'
-                    ];
-
-                    const navElements = [];
-                    for (const selector of navSelectors) {
-                        const elements = document.querySelectorAll(selector);
-                        elements.forEach(el => navElements.push(el));
-                    }
-
-                    // Extract text and links from nav elements
-                    navElements.forEach(nav => {
-                        // Get all links
-                        const links = nav.querySelectorAll('a');
-                        links.forEach(link => {
-                            const text = link.textContent.trim();
-                            const href = link.href;
-
-                            if (text && text.length > 1 && text.length < 100) {
-                                navTexts.push(text.toLowerCase());
-                            }
-                            if (href && href.startsWith('http')) {
-                                navLinks.push(href);
-                            }
-                        });
-                    });
-
-                    return {
-                        text: [...new Set(navTexts)],
-                        links: [...new Set(navLinks)]
-                    };
-                }
-            ''')
-
-            nav_data = result
-
-        except Exception as e:
-            logger.debug(f"Navigation extraction error: {e}")
-
-        return nav_data
-
-    async def _extract_hero_text(self, page: Page) -> List[str]:
-        """Extract hero section headlines and text."""
-        hero_texts = []
-
-        try:
-            hero_texts = await page.evaluate('''
-                () => {
-                    const texts = [];
-
-                    // Hero section selectors
-                    const heroSelectors = [
-                        '.hero', '.banner', '.jumbotron',
-                        '[class*="hero"]', '[class*="banner"]',
-                        'section:first-of-type'
-                    ];
-
-                    const heroElements = [];
-                    for (const selector of heroSelectors) {
-                        const elements = document.querySelectorAll(selector);
-                        elements.forEach(el => heroElements.push(el));
-                        if (heroElements.length > 0) break;
-                    }
-
-                    // Extract h1-h3 and prominent text
-                    heroElements.forEach(hero => {
-                        const headings = hero.querySelectorAll('h1, h2, h3');
-                        headings.forEach(h => {
-                            const text = h.textContent.trim();
-                            if (text && text.length > 3) {
-                                texts.push(text.toLowerCase());
-                            }
-                        });
-                    });
-
-                    return [...new Set(texts)];
-                }
-            ''')
-
-        except Exception as e:
-            logger.debug(f"Hero text extraction error: {e}")
-
-        return hero_texts
-
-    async def _extract_cta_text(self, page: Page) -> List[str]:
-        """Extract CTA button text."""
-        cta_texts = []
-
-        try:
-            cta_texts = await page.evaluate('''
-                () => {
-                    const texts = [];
-
-                    // Find buttons and prominent links
-                    const buttons = document.querySelectorAll(
-                        'button, a.button, a.btn, [role="button"], .cta'
-                    );
-
-                    buttons.forEach(btn => {
-                        const text = btn.textContent.trim();
-                        if (text && text.length > 2 && text.length < 50) {
-                            texts.push(text.toLowerCase());
-                        }
-                    });
-
-                    return [...new Set(texts)];
-                }
-            ''')
-
-        except Exception as e:
-            logger.debug(f"CTA text extraction error: {e}")
-
-        return cta_texts
-
     def _detect_language(self, text: str) -> str:
         """Detect language from text."""
-        if not text or len(text) < 10:
+        if not text:
             return 'en'
 
-        try:
-            lang = detect(text)
-            # Map to our supported languages
-            if lang in self.bodywear_terms:
-                return lang
-            return 'en'  # Default to English
-        except LangDetectException:
+        # Dictionary hits name the language directly and are more reliable
+        # than n-gram detection on short nav text; langdetect is the fallback
+        hits = Counter(self._bodywear_pattern.findall(text))
+        if hits:
+            hits_by_lang = {}
+            for lang, _, key in self._bodywear_entries:
+                if hits[key]:
+                    hits_by_lang[lang] = hits_by_lang.get(lang, 0) + hits[key]
+            return max(hits_by_lang, key=hits_by_lang.get)
+
+        if len(text) < 10:
             return 'en'
 
-    async def _extract_images(self, page: Page, domain: str) -> List[str]:
-        """Extract prominent images from the page."""
-        images = []
+        return _langdetect_language(text, self._supported_langs)
 
+    async def _trigger_lazy_loading(self, page: Page):
+        """Scroll the page so lazy-loaded images get real sources and sizes."""
         try:
-            # Scroll down to trigger lazy loading
-            try:
-                await page.evaluate('''
-                    () => {
-                        window.scrollTo(0, document.body.scrollHeight / 2);
-                    }
-                ''')
-                await asyncio.sleep(1)
-                await page.evaluate('() => window.scrollTo(0, 0)')
-                await asyncio.sleep(0.5)
-            except Exception:
-                pass
-
-            # Extract images with multiple strategies
-            image_urls = await page.evaluate('''
+            await page.evaluate('''
                 () => {
-                    const images = [];
-                    const seenUrls = new Set();
-
-                    // Strategy 1: Regular img tags
-                    const imgElements = document.querySelectorAll('img');
-                    imgElements.forEach(img => {
-                        const width = img.naturalWidth || img.width || img.offsetWidth;
-                        const height = img.naturalHeight || img.height || img.offsetHeight;
-
-                        if (width >= 150 && height >= 150) {
-                            // Try multiple attributes for lazy-loaded images
-                            const src = img.src || img.dataset.src || img.dataset.lazySrc ||
-                                       img.dataset.original || img.getAttribute('data-lazy-src');
-
-                            if (src && (src.startsWith('http') || src.startsWith('//'))) {
-                                const fullSrc = src.startsWith('//') ? 'https:' + src : src;
-                                if (!seenUrls.has(fullSrc)) {
-                                    seenUrls.add(fullSrc);
-                                    images.push({
-                                        url: fullSrc,
-                                        width: width,
-                                        height: height
-                                    });
-                                }
-                            }
-                        }
-                    });
-
-                    // Strategy 2: Background images
-                    const divs = document.querySelectorAll('div, section, a');
-                    divs.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const bgImage = style.backgroundImage;
-
-                        if (bgImage && bgImage !== 'none') {
-                            const match = bgImage.match(/url\\(["']?([^"')]+)["']?\\)/);
-                            if (match && match[1]) {
-                                const src = match[1];
-                                if (src.startsWith('http') || src.startsWith('//')) {
-                                    const fullSrc = src.startsWith('//') ? 'https:' + src : src;
-                                    if (!seenUrls.has(fullSrc)) {
-                                        seenUrls.add(fullSrc);
-                                        const rect = el.getBoundingClientRect();
-                                        if (rect.width >= 150 && rect.height >= 150) {
-                                            images.push({
-                                                url: fullSrc,
-                                                width: rect.width,
-                                                height: rect.height
-                                            });
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    });
-
-                    // Sort by size
-                    images.sort((a, b) => (b.width * b.height) - (a.width * a.height));
-
-                    return images.slice(0, 8).map(img => img.url);
+                    window.scrollTo(0, document.body.scrollHeight / 2);
                 }
             ''')
-
-            images = image_urls
-
-        except Exception as e:
-            logger.debug(f"Image extraction error: {e}")
-
-        return images
+            # Long enough for IntersectionObserver-based loaders to fire
+            await asyncio.sleep(0.4)
+            # Back to the top for the screenshot and hero extraction; image
+            # sizes are already resolved, so there is nothing to wait for
+            await page.evaluate('() => window.scrollTo(0, 0)')
+        except Exception:
+            pass
 
     def calculate_text_score(self, features: Dict) -> Dict:
         """
@@ -333,47 +404,45 @@ class FeatureExtractor:
         Returns:
             Dict with scores and details
         """
-        # Combine all text
-        nav_text = ' '.join(features['nav_text'])
-        hero_text = ' '.join(features['hero_text'])
-        cta_text = ' '.join(features['cta_text'])
-        all_text = nav_text + ' ' + hero_text + ' ' + cta_text
+        # Combine all text into one buffer. Sections are separated by a newline,
+        # which no (space-separated) multi-word term can match across, so a
+        # single scan counts exactly what scanning each section would.
+        all_text = '\n'.join((
+            ' '.join(features['nav_text']),
+            ' '.join(features['hero_text']),
+            ' '.join(features['cta_text'])
+        ))
+
+        # Check ALL languages (sites may mix languages or use international terms).
+        # One scan finds every term; hits are then credited to each language
+        # that lists the term.
+        bodywear_hits = Counter(self._bodywear_pattern.findall(all_text))
 
-        # Check ALL languages (sites may mix languages or use international terms)
         bodywear_count = 0
         found_bodywear_terms = []
         found_bodywear_by_lang = {}
 
-        for lang, terms in self.bodywear_terms.items():
-            lang_matches = 0
-            for term in terms:
-                pattern = r'\b' + re.escape(term.lower()) + r'\b'
-                nav_matches = len(re.findall(pattern, nav_text))
-                hero_matches = len(re.findall(pattern, hero_text))
-                cta_matches = len(re.findall(pattern, cta_text))
-
-                total_matches = nav_matches + hero_matches + cta_matches
-                if total_matches > 0:
-                    bodywear_count += total_matches
-                    lang_matches += total_matches
-                    if term not in found_bodywear_terms:
-                        found_bodywear_terms.append(term)
-
-            if lang_matches > 0:
-                found_bodywear_by_lang[lang] = lang_matches
+        # Pages without any hit (the common case) skip the per-term accounting
+        for lang, term, key in (self._bodywear_entries if bodywear_hits else ()):
+            total_matches = bodywear_hits[key]
+            if total_matches > 0:
+                bodywear_count += total_matches
+                found_bodywear_by_lang[lang] = found_bodywear_by_lang.get(lang, 0) + total_matches
+                if term not in found_bodywear_terms:
+                    found_bodywear_terms.append(term)
 
         # Count generalist terms across ALL languages
+        generalist_hits = Counter(self._generalist_pattern.findall(all_text))
+
         generalist_count = 0
         found_generalist_terms = []
 
-        for lang, terms in self.generalist_terms.items():
-            for term in terms:
-                pattern = r'\b' + re.escape(term.lower()) + r'\b'
-                matches = len(re.findall(pattern, all_text))
-                if matches > 0:
-                    generalist_count += matches
-                    if term not in found_generalist_terms:
-                        found_generalist_terms.append(term)
+        for lang, term, key in (self._generalist_entries if generalist_hits else ()):
+            matches = generalist_hits[key]
+            if matches > 0:
+                generalist_count += matches
+                if term not in found_generalist_terms:
+                    found_generalist_terms.append(term)
 
         # Calculate weighted score
         weights = self.config['scoring']['stage_a_weights']
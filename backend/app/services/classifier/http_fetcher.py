@@ -1,5 +1,5 @@
 """
-Stage 1: Simple HTTP fetcher with BeautifulSoup parsing.
+Stage 1: Simple HTTP fetcher with selectolax (lexbor) parsing.
 Fast, reliable, no browser overhead.
 """
 import asyncio
@@ -8,10 +8,33 @@ from typing import Dict, Optional
 from urllib.parse import urljoin
 
 import aiohttp
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_HTML_BYTES = 512 * 1024
+
+
+async def _read_capped(response: aiohttp.ClientResponse, limit: int) -> bytes:
+    """Read at most `limit` bytes of the response body."""
+    chunks = []
+    remaining = limit
+    while remaining > 0:
+        chunk = await response.content.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def _decode_html(raw: bytes, charset: Optional[str]) -> str:
+    """Decode a (possibly truncated) body, tolerating bad or unknown charsets."""
+    try:
+        return raw.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
 
 class HttpFetcher:
     """Simple HTTP fetcher for Stage 1 classification."""
@@ -20,6 +43,8 @@ class HttpFetcher:
         """Initialize HTTP fetcher."""
         self.config = config
         self.timeout = aiohttp.ClientTimeout(total=20)
+        # Only the top of the document (head, header, nav, first headings) is used
+        self.max_html_bytes = config.get('crawler', {}).get('max_html_bytes', DEFAULT_MAX_HTML_BYTES)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -29,11 +54,39 @@ class HttpFetcher:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
+        # Shared across fetches so connections and DNS lookups are reused
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use (needs a running loop)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=2, ttl_dns_cache=300)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     async def fetch_domain(self, domain: str) -> Dict:
         """
         Fetch domain via simple HTTP.
 
+        HTTPS and HTTP are requested concurrently and the first successful
+        response wins, so a hanging HTTPS endpoint doesn't delay the HTTP
+        fallback by the full timeout.
+
         Args:
             domain: Domain name
 
@@ -55,60 +108,113 @@ class HttpFetcher:
         # Try both HTTPS and HTTP
         urls_to_try = [f"https://{domain}", f"http://{domain}"]
 
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            for url in urls_to_try:
-                try:
-                    logger.debug(f"HTTP fetch: {url}")
-                    async with session.get(url, headers=self.headers, allow_redirects=True) as response:
-                        result['http_status'] = response.status
-                        result['final_url'] = str(response.url)
-
-                        if response.status != 200:
-                            logger.debug(f"HTTP {response.status} for {url}")
-                            continue
-
-                        html = await response.text()
-                        result['html_length'] = len(html)
-
-                        # Parse with BeautifulSoup
-                        soup = BeautifulSoup(html, 'html.parser')
-
-                        # Extract navigation text
-                        nav_elements = soup.find_all(['nav', 'header']) + soup.find_all(attrs={'role': 'navigation'})
-                        for nav in nav_elements[:3]:  # Limit to first 3
-                            links = nav.find_all('a')
-                            for link in links[:50]:  # Limit links per nav
-                                text = link.get_text(strip=True).lower()
-                                if text and 2 < len(text) < 100:
-                                    result['nav_text'].append(text)
-
-                        # Extract hero/heading text
-                        headings = soup.find_all(['h1', 'h2', 'h3'])
-                        for h in headings[:10]:
-                            text = h.get_text(strip=True).lower()
-                            if text and len(text) > 3:
-                                result['hero_text'].append(text)
-
-                        # Extract all link text (for evidence)
-                        all_links = soup.find_all('a', href=True)
-                        for link in all_links[:100]:  # First 100 links
-                            text = link.get_text(strip=True).lower()
-                            if text and len(text) > 2:
-                                result['all_links_text'].append(text)
-
-                        result['success'] = True
-                        logger.info(f"HTTP fetch successful for {domain}: {len(result['nav_text'])} nav items, {len(result['hero_text'])} headings")
-                        return result
-
-                except asyncio.TimeoutError:
-                    logger.debug(f"Timeout fetching {url}")
-                    result['error'] = f"Timeout: {url}"
-                except Exception as e:
-                    logger.debug(f"Error fetching {url}: {e}")
-                    result['error'] = str(e)
+        session = self._get_session()
+        tasks = [asyncio.create_task(self._fetch_url(session, url)) for url in urls_to_try]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                attempt = await finished
+                if attempt['success']:
+                    result.update(attempt)
+                    logger.info(f"HTTP fetch successful for {domain}: {len(result['nav_text'])} nav items, {len(result['hero_text'])} headings")
+                    return result
+
+                # Keep the evidence of the latest failed attempt
+                for key in ('http_status', 'final_url', 'error'):
+                    if attempt[key] is not None:
+                        result[key] = attempt[key]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         # If we got here, both HTTPS and HTTP failed
-        if not result['success']:
-            logger.warning(f"HTTP fetch failed for {domain}: {result['error']}")
+        logger.warning(f"HTTP fetch failed for {domain}: {result['error']}")
 
         return result
+
+    async def _fetch_url(self, session: aiohttp.ClientSession, url: str) -> Dict:
+        """
+        Fetch and parse a single URL.
+
+        Returns:
+            Dict with success, http_status, final_url, error and, on success,
+            html_length and the extracted text lists
+        """
+        attempt = {
+            'success': False,
+            'http_status': None,
+            'final_url': None,
+            'error': None
+        }
+
+        try:
+            logger.debug(f"HTTP fetch: {url}")
+            async with session.get(url, headers=self.headers, allow_redirects=True) as response:
+                attempt['http_status'] = response.status
+                attempt['final_url'] = str(response.url)
+
+                if response.status != 200:
+                    logger.debug(f"HTTP {response.status} for {url}")
+                    return attempt
+
+                raw = await _read_capped(response, self.max_html_bytes)
+                html = _decode_html(raw, response.charset)
+
+            attempt.update(self._parse_html(html))
+
+        except asyncio.TimeoutError:
+            logger.debug(f"Timeout fetching {url}")
+            attempt['error'] = f"Timeout: {url}"
+            return attempt
+        except Exception as e:
+            logger.debug(f"Error fetching {url}: {e}")
+            attempt['error'] = str(e)
+            return attempt
+
+        attempt['success'] = True
+        return attempt
+
+    def _parse_html(self, html: str) -> Dict:
+        """Extract nav, heading and link text from a page."""
+        parsed = {
+            'html_length': len(html),
+            'nav_text': [],
+            'hero_text': [],
+            'all_links_text': []
+        }
+
+        # Parse with lexbor (C parser)
+        tree = LexborHTMLParser(html)
+        # get_text() used to skip script/style contents; drop them up front
+        tree.strip_tags(['script', 'style'])
+
+        # Extract navigation text
+        nav_elements = tree.css('nav, header') + tree.css('[role="navigation"]')
+        for nav in nav_elements[:3]:  # Limit to first 3
+            links = nav.css('a')
+            for link in links[:50]:  # Limit links per nav
+                text = link.text(strip=True).lower()
+                if text and 2 < len(text) < 100:
+                    parsed['nav_text'].append(text)
+
+        # Extract hero/heading text
+        headings = tree.css('h1, h2, h3')
+        for h in headings[:10]:
+            text = h.text(strip=True).lower()
+            if text and len(text) > 3:
+                parsed['hero_text'].append(text)
+
+        # Extract all link text (for evidence)
+        all_links = tree.css('a[href]')
+        for link in all_links[:100]:  # First 100 links
+            text = link.text(strip=True).lower()
+            if text and len(text) > 2:
+                parsed['all_links_text'].append(text)
+
+        # Deduplicate (preserving order) like the Playwright and Firecrawl stages:
+        # repeated menus (desktop + mobile nav) shouldn't be scored twice
+        parsed['nav_text'] = list(dict.fromkeys(parsed['nav_text']))
+        parsed['hero_text'] = list(dict.fromkeys(parsed['hero_text']))
+        parsed['all_links_text'] = list(dict.fromkeys(parsed['all_links_text']))
+
+        return parsed
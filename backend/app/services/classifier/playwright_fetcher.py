@@ -5,12 +5,19 @@ Only used when HTTP fetch fails or returns low confidence.
 import asyncio
 import logging
 import random
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from playwright.async_api import Browser, Page
+from playwright.async_api import Browser, BrowserContext, Page
 
 logger = logging.getLogger(__name__)
 
+# Screenshots only feed the Vision API, which downsizes them to
+# vision.max_image_dimension first, so a lower JPEG quality loses nothing
+SCREENSHOT_JPEG_QUALITY = 50
+
+# Pages served by one pooled browser context before it is recycled
+CONTEXT_REUSE_LIMIT = 20
+
 
 class PlaywrightFetcher:
     """Hardened Playwright fetcher for Stage 2."""
@@ -18,8 +25,55 @@ class PlaywrightFetcher:
     def __init__(self, config: Dict):
         """Initialize Playwright fetcher."""
         self.config = config
-        self.nav_timeout = 30000  # 30s navigation timeout
+        # Navigation timeout per URL (crawler.timeout_ms). Retries try HTTPS and
+        # HTTP each, so this bounds how long a dead site holds a worker slot
+        self.nav_timeout = config.get('crawler', {}).get('timeout_ms', 15000)
         self.user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        # Idle contexts (with their use count) kept for the next fetch, so
+        # concurrent domains don't each pay for setting up a new context
+        self._idle_contexts: List[Tuple[BrowserContext, int]] = []
+
+    async def _acquire_context(self, browser: Browser) -> Tuple[BrowserContext, int]:
+        """Take an idle context of this browser, or create one. Returns (context, uses)."""
+        while self._idle_contexts:
+            context, uses = self._idle_contexts.pop()
+            if context.browser is browser:
+                return context, uses
+            # Left over from a browser that has since been restarted
+            await self._close_context(context)
+
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=self.user_agent,
+            locale='en-US',
+            timezone_id='America/New_York'
+        )
+        return context, 0
+
+    async def _release_context(self, context: BrowserContext, uses: int, reusable: bool):
+        """Return a context to the pool, or close it if it failed or is due for recycling."""
+        if reusable and uses < CONTEXT_REUSE_LIMIT:
+            try:
+                # Don't carry cookie/consent state over to the next domain
+                await context.clear_cookies()
+                self._idle_contexts.append((context, uses))
+                return
+            except Exception:
+                pass
+        await self._close_context(context)
+
+    async def _close_context(self, context: BrowserContext):
+        """Close a context, ignoring errors from an already closed browser."""
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def close_contexts(self):
+        """Close all idle contexts (call before closing the browser)."""
+        idle, self._idle_contexts = self._idle_contexts, []
+        for context, _ in idle:
+            await self._close_context(context)
 
     async def fetch_domain(self, domain: str, browser: Browser, attempt: int = 0) -> Dict:
         """
@@ -47,21 +101,22 @@ class PlaywrightFetcher:
             'error': None
         }
 
-        # Retry strategies: alternate between different wait conditions
-        wait_strategies = ['domcontentloaded', 'load', 'networkidle']
+        # Screenshots are only consumed by Vision; don't capture or ship them otherwise
+        capture_screenshot = self.config.get('vision', {}).get('enabled', False)
+
+        # Retry strategies: alternate between different wait conditions.
+        # No networkidle: analytics beacons and chat widgets keep many sites
+        # from ever going idle, and the nav wait below covers late rendering
+        wait_strategies = ['domcontentloaded', 'load']
         wait_until = wait_strategies[attempt % len(wait_strategies)]
 
         context = None
+        context_uses = 0
         page = None
 
         try:
-            # Create fresh context for this attempt
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent=self.user_agent,
-                locale='en-US',
-                timezone_id='America/New_York'
-            )
+            # Pooled context; failed attempts discard it, so a retry starts fresh
+            context, context_uses = await self._acquire_context(browser)
 
             page = await context.new_page()
 
@@ -85,10 +140,13 @@ class PlaywrightFetcher:
                         logger.warning(f"Challenge page detected for {domain}: HTTP {response.status}")
                         result['error'] = f"Challenge page: HTTP {response.status}"
                         # Capture screenshot as evidence
-                        try:
-                            result['screenshot_bytes'] = await page.screenshot(type='jpeg', quality=70)
-                        except:
-                            pass
+                        if capture_screenshot:
+                            try:
+                                result['screenshot_bytes'] = await page.screenshot(
+                                    type='jpeg', quality=SCREENSHOT_JPEG_QUALITY
+                                )
+                            except:
+                                pass
                         return result
 
             except Exception as e1:
@@ -108,15 +166,16 @@ class PlaywrightFetcher:
                     raise Exception(f"Both HTTPS and HTTP failed: {e2}")
 
             # Capture screenshot early (before any manipulation)
-            try:
-                result['screenshot_bytes'] = await page.screenshot(
-                    type='jpeg',
-                    quality=70,
-                    full_page=False
-                )
-                logger.debug(f"Screenshot captured: {len(result['screenshot_bytes'])} bytes")
-            except Exception as e:
-                logger.debug(f"Screenshot failed: {e}")
+            if capture_screenshot:
+                try:
+                    result['screenshot_bytes'] = await page.screenshot(
+                        type='jpeg',
+                        quality=SCREENSHOT_JPEG_QUALITY,
+                        full_page=False
+                    )
+                    logger.debug(f"Screenshot captured: {len(result['screenshot_bytes'])} bytes")
+                except Exception as e:
+                    logger.debug(f"Screenshot failed: {e}")
 
             # Wait for common structural elements (with timeout)
             try:
@@ -150,12 +209,60 @@ class PlaywrightFetcher:
                 except:
                     pass
             if context:
+                await self._release_context(context, context_uses + 1, result['success'])
+
+        return result
+
+    async def screenshot_only(self, domain: str, browser: Browser) -> Optional[bytes]:
+        """
+        Load a domain just far enough to screenshot it.
+
+        For pages whose text already came from Stage 1: skips the nav wait,
+        modal dismissal and feature extraction of fetch_domain, which takes
+        its screenshot at the same point (right after navigation).
+
+        Returns:
+            JPEG bytes, or None if the page couldn't be loaded
+        """
+        context = None
+        context_uses = 0
+        page = None
+        screenshot = None
+
+        try:
+            context, context_uses = await self._acquire_context(browser)
+            page = await context.new_page()
+
+            # Try HTTPS first, then HTTP
+            for url in (f"https://{domain}", f"http://{domain}"):
                 try:
-                    await context.close()
+                    await page.goto(url, wait_until='domcontentloaded', timeout=self.nav_timeout)
+                    break
+                except Exception as e:
+                    logger.debug(f"Screenshot navigation failed for {url}: {e}")
+            else:
+                return None
+
+            screenshot = await page.screenshot(
+                type='jpeg',
+                quality=SCREENSHOT_JPEG_QUALITY,
+                full_page=False
+            )
+            logger.debug(f"Screenshot captured: {len(screenshot)} bytes")
+
+        except Exception as e:
+            logger.debug(f"Screenshot failed for {domain}: {e}")
+
+        finally:
+            if page and not page.is_closed():
+                try:
+                    await page.close()
                 except:
                     pass
+            if context:
+                await self._release_context(context, context_uses + 1, screenshot is not None)
 
-        return result
+        return screenshot
 
     async def _safe_modal_dismissal(self, page: Page):
         """
@@ -199,10 +306,11 @@ class PlaywrightFetcher:
         try:
             # Single JavaScript call to extract all features
             extracted = await page.evaluate('''() => {
+                // Sets dedupe as text is collected
                 const result = {
-                    nav_text: [],
-                    hero_text: [],
-                    all_links_text: [],
+                    nav_text: new Set(),
+                    hero_text: new Set(),
+                    all_links_text: new Set(),
                     html_length: document.documentElement.outerHTML.length
                 };
 
@@ -215,7 +323,7 @@ class PlaywrightFetcher:
                         links.forEach(link => {
                             const text = link.textContent.trim().toLowerCase();
                             if (text && text.length > 2 && text.length < 100) {
-                                result.nav_text.push(text);
+                                result.nav_text.add(text);
                             }
                         });
                     });
@@ -226,7 +334,7 @@ class PlaywrightFetcher:
                 headings.forEach(h => {
                     const text = h.textContent.trim().toLowerCase();
                     if (text && text.length > 3) {
-                        result.hero_text.push(text);
+                        result.hero_text.add(text);
                     }
                 });
 
@@ -235,17 +343,16 @@ class PlaywrightFetcher:
                 Array.from(allLinks).slice(0, 100).forEach(link => {
                     const text = link.textContent.trim().toLowerCase();
                     if (text && text.length > 2) {
-                        result.all_links_text.push(text);
+                        result.all_links_text.add(text);
                     }
                 });
 
-                // Deduplicate
-                result.nav_text = [...new Set(result.nav_text)];
-                result.hero_text = [...new Set(result.hero_text)];
-                result.all_links_text = [...new Set(result.all_links_text)];
+                result.nav_text = [...result.nav_text];
+                result.hero_text = [...result.hero_text];
+                result.all_links_text = [...result.all_links_text];
 
                 return result;
-            }()''')
+            }''')
 
             features.update(extracted)
 
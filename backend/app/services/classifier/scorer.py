@@ -3,7 +3,10 @@ Two-stage classifier with OpenAI Vision integration.
 """
 import asyncio
 import base64
+import hashlib
+import json
 import logging
+from collections import OrderedDict
 from io import BytesIO
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
@@ -16,6 +19,188 @@ from ..api_tracker import ApiTracker
 
 logger = logging.getLogger(__name__)
 
+# Concurrent image downloads per domain (overridable via vision.download_concurrency)
+DEFAULT_DOWNLOAD_CONCURRENCY = 8
+# Concurrent OpenAI Vision requests (overridable via vision.vision_concurrency)
+DEFAULT_VISION_CONCURRENCY = 5
+# Per-attempt timeout of a Vision request (overridable via vision.request_timeout_seconds)
+DEFAULT_VISION_TIMEOUT_SECONDS = 20.0
+# JPEG quality of images sent to Vision (detail=low only looks at a 512px
+# version, so higher qualities just add upload bytes)
+PRODUCT_IMAGE_JPEG_QUALITY = 75
+SCREENSHOT_JPEG_QUALITY = 70
+# JPEGs already within max_image_dimension and this size skip re-encoding
+PASSTHROUGH_JPEG_MAX_BYTES = 96 * 1024
+# Images that can't show a product: vector/animated formats and tracking pixels
+_NON_PRODUCT_IMAGE_EXTENSIONS = ('.svg', '.gif', '.ico')
+_NON_PRODUCT_IMAGE_MARKERS = ('pixel', '1x1', 'spacer')
+# Downloaded images smaller than this (either side) are skipped
+MIN_IMAGE_DIMENSION = 64
+# Vision scores remembered per image content (LRU)
+VISION_CACHE_SIZE = 4096
+
+
+# What counts as bodywear for product images; shared by the single-image
+# and batched prompts
+_BODYWEAR_IMAGE_GUIDE = """BODYWEAR INCLUDES:
+- Lingerie: bras, panties, underwear, corsets, babydolls, chemises, teddies
+- Sleepwear: pajamas, pyjamas, nightgowns, robes, sleep sets
+- Swimwear: bikinis, one-pieces, swim trunks, boardshorts
+- Shapewear: control garments, body shapers
+- Hosiery: stockings, tights, socks
+- Loungewear: comfortable home wear
+- Basic underwear: boxers, briefs, trunks, boyshorts, thongs
+
+NOT BODYWEAR:
+- Regular clothing: dresses, shirts, pants, skirts, outerwear
+- Accessories: bags, shoes, jewelry
+- Non-intimate apparel"""
+
+_SINGLE_IMAGE_PROMPT = """Analyze this product image and determine if it shows BODYWEAR/INTIMATE APPAREL.
+
+""" + _BODYWEAR_IMAGE_GUIDE + """
+
+Respond with JSON where bodywear_score is the probability this image shows bodywear (0.0=definitely not bodywear, 1.0=definitely bodywear):
+{"bodywear_score": 0.0-1.0, "reasoning": "brief explanation"}
+
+Examples:
+- Lingerie/bra image: {"bodywear_score": 0.95, "reasoning": "..."}
+- Regular dress: {"bodywear_score": 0.05, "reasoning": "..."}
+- Swimwear: {"bodywear_score": 0.85, "reasoning": "..."}"""
+
+_IMAGE_BATCH_PROMPT = """Analyze these {count} product images and determine for EACH whether it shows BODYWEAR/INTIMATE APPAREL.
+
+""" + _BODYWEAR_IMAGE_GUIDE + """
+
+Respond with JSON holding one bodywear_score per image, in the order the images were given (0.0=definitely not bodywear, 1.0=definitely bodywear):
+{{"scores": [0.0-1.0, ...]}}"""
+
+# Homepage screenshot prompt, used when a page has no usable product images
+_SCREENSHOT_PROMPT = """Analyze this e-commerce homepage screenshot to determine the retailer type.
+
+CLASSIFICATION GUIDE:
+
+BODYWEAR SPECIALIST (score 0.7-1.0):
+- Navigation shows PRIMARILY bodywear categories: Lingerie, Bras, Underwear, Sleepwear, Swimwear, Shapewear
+- Hero images feature models in lingerie, bras, underwear, or swimwear
+- Brand positioning focuses on intimate apparel, bodywear, or sleepwear
+- Examples: Agent Provocateur, Victoria's Secret Lingerie, Bluebella
+
+BODYWEAR LEANING (score 0.45-0.7):
+- Significant bodywear presence (30-60% of navigation)
+- Mix of bodywear (sleepwear, swimwear, loungewear) + other apparel (dresses, tops)
+- Hero may show loungewear, sleepwear, or beachwear alongside regular clothing
+- Examples: Asceno (sleepwear + dresses), resort wear brands with swimwear focus
+
+GENERALIST (score 0.0-0.45):
+- Broad fashion categories: Outerwear, Denim, Shoes, Accessories, Kids, Home
+- Bodywear is minor/absent in navigation
+- Hero shows regular clothing, outerwear, or accessories
+- Examples: Zara, H&M, fashion department stores
+
+LOOK FOR:
+1. Navigation menu (most important) - what categories dominate?
+2. Hero images - what products are showcased?
+3. Visible product imagery - lingerie/underwear vs regular clothing?
+4. Brand name/messaging - does it suggest intimates focus?
+
+Respond with JSON where bodywear_score is the probability this is a bodywear specialist (0.0=definitely generalist, 1.0=definitely bodywear specialist):
+{"bodywear_score": 0.0-1.0, "reasoning": "brief explanation"}
+
+Examples:
+- Lingerie/underwear focused site: {"bodywear_score": 0.90, "reasoning": "..."}
+- General fashion site: {"bodywear_score": 0.10, "reasoning": "..."}
+- Mixed (some bodywear): {"bodywear_score": 0.50, "reasoning": "..."}"""
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the first complete {...} object in a Vision answer, or None.
+
+    Models sometimes wrap the JSON in prose or code fences. A single pass
+    tracks brace depth (ignoring braces inside strings), so trailing text
+    with its own braces doesn't end up in the slice.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return None
+
+
+def _is_candidate_image_url(url: str) -> bool:
+    """Cheap URL check that drops images not worth downloading for Vision."""
+    path = urlparse(url).path.lower()
+    if path.endswith(_NON_PRODUCT_IMAGE_EXTENSIONS):
+        return False
+    return not any(marker in path for marker in _NON_PRODUCT_IMAGE_MARKERS)
+
+
+def _resize_to_base64(image_data: bytes, max_size: int, quality: int) -> str:
+    """
+    Decode an image, shrink it to fit max_size and return it as base64 JPEG.
+
+    CPU-bound; async callers run it via asyncio.to_thread.
+    """
+    img = Image.open(BytesIO(image_data))
+    try:
+        if min(img.size) < MIN_IMAGE_DIMENSION:
+            raise ValueError(f"image too small: {img.size[0]}x{img.size[1]}")
+
+        # Already a small JPEG (e.g. a CDN thumbnail): send it as is. Opening
+        # only parsed the header, so this skips a full decode and re-encode
+        if (
+            img.format == 'JPEG' and
+            img.mode in ('RGB', 'L') and
+            max(img.size) <= max_size and
+            len(image_data) <= PASSTHROUGH_JPEG_MAX_BYTES
+        ):
+            return base64.b64encode(image_data).decode('ascii')
+
+        # JPEG shrink-on-load: let libjpeg decode at 1/2, 1/4 or 1/8 scale
+        # while staying >= max_size, so LANCZOS runs on far fewer pixels.
+        # No-op for other formats.
+        img.draft('RGB', (max_size, max_size))
+
+        # Convert to RGB if needed
+        if img.mode in ('RGBA', 'P', 'LA'):
+            converted = img.convert('RGB')
+            img.close()
+            img = converted
+
+        # Resize if larger than max_size
+        if max(img.size) > max_size:
+            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+        # Convert to base64 (optimized Huffman tables: ~10% smaller, same pixels)
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return base64.b64encode(buffer.getvalue()).decode('ascii')
+    finally:
+        # MEMORY FIX: Explicitly close PIL Image to prevent leak
+        img.close()
+
 
 class Scorer:
     """Two-stage scorer with text heuristics and vision API."""
@@ -26,16 +211,44 @@ class Scorer:
         self.vision_config = config['vision']
         self.scoring_config = config['scoring']
 
-        # CRITICAL FIX: OpenAI client with timeout to prevent hanging requests
+        # CRITICAL FIX: OpenAI client with timeout to prevent hanging requests.
+        # A stalled call is cut off and retried once (the SDK backs off and also
+        # retries 429/5xx), so one domain can't hold Stage B for minutes.
         self.openai_client = AsyncOpenAI(
             api_key=openai_api_key,
-            timeout=60.0,  # 60 second timeout for API calls
-            max_retries=2  # Retry failed requests up to 2 times
+            timeout=self.vision_config.get('request_timeout_seconds', DEFAULT_VISION_TIMEOUT_SECONDS),
+            max_retries=1
         ) if openai_api_key else None
 
+        # Caps concurrent Vision requests across all domains using this scorer
+        self._vision_semaphore = asyncio.Semaphore(
+            self.vision_config.get('vision_concurrency', DEFAULT_VISION_CONCURRENCY)
+        )
+
+        # Content hash -> Vision score, so repeated images (shared product
+        # shots, identical screenshots on retries) skip the API call
+        self._vision_cache: OrderedDict = OrderedDict()
+
+        # Shared across domains so image CDN connections and DNS lookups are reused
+        self._session: Optional[aiohttp.ClientSession] = None
+
         # Stage B trigger range
         self.stage_b_range = self.scoring_config['stage_b_trigger_range']
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared image download session, creating it on first use (needs a running loop)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared image download session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def classify(self, features: Dict, text_score_data: Dict) -> Dict:
         """
         Classify domain using two-stage approach.
@@ -95,11 +308,18 @@ class Scorer:
         if need_vision:
             vision_score = None
 
-            # Try to analyze images if available
-            if features['image_urls']:
+            # Try to analyze images if available. Drop repeated URLs (the same
+            # hero in several slots) and URLs that can't be product shots, so
+            # the image budget covers usable images
+            image_urls = [
+                url for url in dict.fromkeys(features['image_urls'])
+                if _is_candidate_image_url(url)
+            ]
+
+            if image_urls:
                 # Stage B: Vision analysis via images
-                vision_score = await self._analyze_images(features['image_urls'])
-                result['image_count'] = len(features['image_urls'][:self.vision_config['images_per_domain']])
+                vision_score = await self._analyze_images(image_urls)
+                result['image_count'] = len(image_urls[:self.vision_config['images_per_domain']])
                 reasons.append(f"vision_images:{vision_score:.2f}")
 
             # If no images, try screenshot (for any borderline case, not just failed text)
@@ -177,15 +397,36 @@ class Scorer:
         if not processed_images:
             return 0.5
 
-        # Analyze each image
+        # Cached images need no API call; the rest go out in one batched request
         scores = []
+        pending = []
         for img_data in processed_images:
-            try:
-                score = await self._classify_single_image(img_data)
-                if score is not None:
-                    scores.append(score)
-            except Exception as e:
-                logger.debug(f"Image classification failed: {e}")
+            key = self._vision_cache_key('image', img_data.encode('ascii'))
+            cached = self._vision_cache_get(key)
+            if cached is not None:
+                scores.append(cached)
+            else:
+                pending.append((img_data, key))
+
+        if len(pending) > 1:
+            batch_scores = await self._classify_image_batch([img_data for img_data, _ in pending])
+            if batch_scores is not None:
+                for (_, key), score in zip(pending, batch_scores):
+                    self._vision_cache_put(key, score)
+                scores.extend(batch_scores)
+                pending = []
+
+        # A single image, or a batch answer that couldn't be parsed:
+        # analyze the remaining images individually and concurrently
+        results = await asyncio.gather(
+            *(self._classify_single_image_limited(img_data) for img_data, _ in pending),
+            return_exceptions=True
+        )
+        for score in results:
+            if isinstance(score, Exception):
+                logger.debug(f"Image classification failed: {score}")
+            elif score is not None:
+                scores.append(score)
 
         if not scores:
             return 0.5
@@ -195,46 +436,135 @@ class Scorer:
 
     async def _download_and_resize_images(self, image_urls: List[str]) -> List[str]:
         """Download and resize images to save API costs."""
-        processed = []
-        max_size = self.vision_config['max_image_dimension']
-
-        async with aiohttp.ClientSession() as session:
-            for url in image_urls:
-                img = None
-                try:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                        if response.status == 200:
-                            image_data = await response.read()
-
-                            # Resize image
-                            img = Image.open(BytesIO(image_data))
-
-                            # Convert to RGB if needed
-                            if img.mode in ('RGBA', 'P', 'LA'):
-                                img = img.convert('RGB')
-
-                            # Resize if larger than max_size
-                            if max(img.size) > max_size:
-                                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
-                            # Convert to base64
-                            buffer = BytesIO()
-                            img.save(buffer, format='JPEG', quality=85)
-                            img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-                            processed.append(img_base64)
-
-                except Exception as e:
-                    logger.debug(f"Failed to download/resize image {url}: {e}")
-                finally:
-                    # MEMORY FIX: Explicitly close PIL Image to prevent leak
-                    if img is not None:
-                        try:
-                            img.close()
-                        except:
-                            pass
-
-        return processed
+        # Download concurrently (bounded), so N images take about one round trip
+        semaphore = asyncio.Semaphore(
+            self.vision_config.get('download_concurrency', DEFAULT_DOWNLOAD_CONCURRENCY)
+        )
+
+        session = self._get_session()
+        results = await asyncio.gather(*(
+            self._download_and_resize_image(session, semaphore, url)
+            for url in image_urls
+        ))
+
+        return [img_base64 for img_base64 in results if img_base64 is not None]
+
+    async def _download_and_resize_image(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        url: str
+    ) -> Optional[str]:
+        """Download one image and return it resized as base64 JPEG, or None on failure."""
+        try:
+            async with semaphore:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    if response.status != 200:
+                        return None
+                    image_data = await response.read()
+
+            # Resize off the event loop so other downloads and Vision calls progress
+            return await asyncio.to_thread(
+                _resize_to_base64, image_data, self.vision_config['max_image_dimension'], PRODUCT_IMAGE_JPEG_QUALITY
+            )
+
+        except Exception as e:
+            logger.debug(f"Failed to download/resize image {url}: {e}")
+            return None
+
+    def _vision_cache_key(self, kind: str, data: bytes) -> tuple:
+        """Cache key for an image; kind separates the product-image and screenshot prompts."""
+        return kind, hashlib.blake2b(data, digest_size=16).digest()
+
+    def _vision_cache_get(self, key: tuple) -> Optional[float]:
+        """Return a cached Vision score (marking it recently used), or None."""
+        score = self._vision_cache.get(key)
+        if score is not None:
+            self._vision_cache.move_to_end(key)
+        return score
+
+    def _vision_cache_put(self, key: tuple, score: Optional[float]):
+        """Remember a successful Vision score, evicting the least recently used."""
+        if score is None:
+            return
+        self._vision_cache[key] = score
+        self._vision_cache.move_to_end(key)
+        while len(self._vision_cache) > VISION_CACHE_SIZE:
+            self._vision_cache.popitem(last=False)
+
+    async def _classify_single_image_limited(self, image_base64: str) -> Optional[float]:
+        """Classify an image, holding a slot of the shared Vision concurrency limit."""
+        key = self._vision_cache_key('image', image_base64.encode('ascii'))
+        cached = self._vision_cache_get(key)
+        if cached is not None:
+            return cached
+
+        async with self._vision_semaphore:
+            score = await self._classify_single_image(image_base64)
+        self._vision_cache_put(key, score)
+        return score
+
+    async def _classify_image_batch(self, images_base64: List[str]) -> Optional[List[float]]:
+        """
+        Classify several images in a single Vision request.
+
+        Returns:
+            One bodywear probability (0-1) per image, in order, or None if the
+            request fails or the answer doesn't hold exactly one score per image
+        """
+        content = [{"type": "text", "text": _IMAGE_BATCH_PROMPT.format(count=len(images_base64))}]
+        for image_base64 in images_base64:
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image_base64}",
+                    "detail": "low"  # Use low detail to save costs
+                }
+            })
+
+        try:
+            async with self._vision_semaphore:
+                response = await self.openai_client.chat.completions.create(
+                    model=self.vision_config['model'],
+                    messages=[{"role": "user", "content": content}],
+                    max_tokens=80 * len(images_base64),
+                    temperature=0.3
+                )
+
+            # Track successful API call
+            ApiTracker.track_openai_vision(success=True, image_count=len(images_base64))
+
+            # Parse response
+            answer = response.choices[0].message.content.strip()
+            json_text = _extract_json_object(answer)
+            if json_text is None:
+                logger.debug(f"Batched Vision answer has no JSON: {answer[:200]}")
+                return None
+
+            try:
+                data = json.loads(json_text)
+            except ValueError:
+                data = None
+            scores = data.get('scores') if isinstance(data, dict) else None
+            if (
+                not isinstance(scores, list) or
+                len(scores) != len(images_base64) or
+                not all(isinstance(score, (int, float)) for score in scores)
+            ):
+                logger.debug(f"Batched Vision answer doesn't match {len(images_base64)} images: {answer[:200]}")
+                return None
+
+            return [min(1.0, max(0.0, float(score))) for score in scores]
+
+        except Exception as e:
+            error_str = str(e)
+            logger.error(f"Batched Vision API call failed ({type(e).__name__}): {e}")
+            ApiTracker.track_openai_vision(
+                success=False,
+                error_message=error_str[:500],
+                image_count=len(images_base64)
+            )
+            return None
 
     async def _classify_single_image(self, image_base64: str) -> Optional[float]:
         """
@@ -252,29 +582,7 @@ class Scorer:
                         "content": [
                             {
                                 "type": "text",
-                                "text": """Analyze this product image and determine if it shows BODYWEAR/INTIMATE APPAREL.
-
-BODYWEAR INCLUDES:
-- Lingerie: bras, panties, underwear, corsets, babydolls, chemises, teddies
-- Sleepwear: pajamas, pyjamas, nightgowns, robes, sleep sets
-- Swimwear: bikinis, one-pieces, swim trunks, boardshorts
-- Shapewear: control garments, body shapers
-- Hosiery: stockings, tights, socks
-- Loungewear: comfortable home wear
-- Basic underwear: boxers, briefs, trunks, boyshorts, thongs
-
-NOT BODYWEAR:
-- Regular clothing: dresses, shirts, pants, skirts, outerwear
-- Accessories: bags, shoes, jewelry
-- Non-intimate apparel
-
-Respond with JSON where bodywear_score is the probability this image shows bodywear (0.0=definitely not bodywear, 1.0=definitely bodywear):
-{"bodywear_score": 0.0-1.0, "reasoning": "brief explanation"}
-
-Examples:
-- Lingerie/bra image: {"bodywear_score": 0.95, "reasoning": "..."}
-- Regular dress: {"bodywear_score": 0.05, "reasoning": "..."}
-- Swimwear: {"bodywear_score": 0.85, "reasoning": "..."}"""
+                                "text": _SINGLE_IMAGE_PROMPT
                             },
                             {
                                 "type": "image_url",
@@ -296,14 +604,10 @@ Examples:
             # Parse response
             content = response.choices[0].message.content.strip()
 
-            # Try to extract JSON
-            import json
-            import re
-
             # Look for JSON in the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
+            json_text = _extract_json_object(content)
+            if json_text is not None:
+                data = json.loads(json_text)
 
                 # New format: use bodywear_score directly
                 if 'bodywear_score' in data:
@@ -356,82 +660,49 @@ Examples:
         Returns:
             Bodywear probability (0-1), or None if analysis fails
         """
-        img = None
+        key = self._vision_cache_key('screenshot', screenshot_bytes)
+        cached = self._vision_cache_get(key)
+        if cached is not None:
+            logger.info(f"Screenshot analysis: cached score={cached:.2f}")
+            return cached
+
+        score = await self._classify_screenshot_bytes(screenshot_bytes)
+        self._vision_cache_put(key, score)
+        return score
+
+    async def _classify_screenshot_bytes(self, screenshot_bytes: bytes) -> Optional[float]:
+        """Resize a screenshot and score it with the homepage Vision prompt."""
         try:
-            # Resize screenshot to save costs
-            img = Image.open(BytesIO(screenshot_bytes))
-            max_size = self.vision_config['max_image_dimension']
-
-            if max(img.size) > max_size:
-                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
-            # Convert to base64
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=70)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-            # MEMORY FIX: Close PIL Image immediately after conversion
-            img.close()
-            img = None
+            # Resize screenshot to save costs (off the event loop)
+            img_base64 = await asyncio.to_thread(
+                _resize_to_base64, screenshot_bytes, self.vision_config['max_image_dimension'], SCREENSHOT_JPEG_QUALITY
+            )
 
             # Analyze with Vision API using more specific prompt for homepages
-            response = await self.openai_client.chat.completions.create(
-                model=self.vision_config['model'],
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": """Analyze this e-commerce homepage screenshot to determine the retailer type.
-
-CLASSIFICATION GUIDE:
-
-BODYWEAR SPECIALIST (score 0.7-1.0):
-- Navigation shows PRIMARILY bodywear categories: Lingerie, Bras, Underwear, Sleepwear, Swimwear, Shapewear
-- Hero images feature models in lingerie, bras, underwear, or swimwear
-- Brand positioning focuses on intimate apparel, bodywear, or sleepwear
-- Examples: Agent Provocateur, Victoria's Secret Lingerie, Bluebella
-
-BODYWEAR LEANING (score 0.45-0.7):
-- Significant bodywear presence (30-60% of navigation)
-- Mix of bodywear (sleepwear, swimwear, loungewear) + other apparel (dresses, tops)
-- Hero may show loungewear, sleepwear, or beachwear alongside regular clothing
-- Examples: Asceno (sleepwear + dresses), resort wear brands with swimwear focus
-
-GENERALIST (score 0.0-0.45):
-- Broad fashion categories: Outerwear, Denim, Shoes, Accessories, Kids, Home
-- Bodywear is minor/absent in navigation
-- Hero shows regular clothing, outerwear, or accessories
-- Examples: Zara, H&M, fashion department stores
-
-LOOK FOR:
-1. Navigation menu (most important) - what categories dominate?
-2. Hero images - what products are showcased?
-3. Visible product imagery - lingerie/underwear vs regular clothing?
-4. Brand name/messaging - does it suggest intimates focus?
-
-Respond with JSON where bodywear_score is the probability this is a bodywear specialist (0.0=definitely generalist, 1.0=definitely bodywear specialist):
-{"bodywear_score": 0.0-1.0, "reasoning": "brief explanation"}
-
-Examples:
-- Lingerie/underwear focused site: {"bodywear_score": 0.90, "reasoning": "..."}
-- General fashion site: {"bodywear_score": 0.10, "reasoning": "..."}
-- Mixed (some bodywear): {"bodywear_score": 0.50, "reasoning": "..."}"""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{img_base64}",
-                                    "detail": "low"
+            async with self._vision_semaphore:
+                response = await self.openai_client.chat.completions.create(
+                    model=self.vision_config['model'],
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "text",
+                                    "text": _SCREENSHOT_PROMPT
+                                },
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:image/jpeg;base64,{img_base64}",
+                                        "detail": "low"
+                                    }
                                 }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=200,
-                temperature=0.3
-            )
+                            ]
+                        }
+                    ],
+                    max_tokens=200,
+                    temperature=0.3
+                )
 
             # Track successful API call
             ApiTracker.track_openai_vision(success=True, image_count=1)
@@ -440,12 +711,9 @@ Examples:
             content = response.choices[0].message.content.strip()
 
             # Try to extract JSON
-            import json
-            import re
-
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
+            json_text = _extract_json_object(content)
+            if json_text is not None:
+                data = json.loads(json_text)
 
                 # New format: use bodywear_score directly
                 if 'bodywear_score' in data:
@@ -494,10 +762,3 @@ Examples:
                 ApiTracker.track_openai_vision(success=False, error_message=error_str[:500], image_count=1)
 
             return None
-        finally:
-            # MEMORY FIX: Ensure PIL Image is always closed, even on exception
-            if img is not None:
-                try:
-                    img.close()
-                except:
-                    pass
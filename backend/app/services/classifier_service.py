@@ -2,12 +2,17 @@
 Classifier service adapted for API use with database storage
 """
 import asyncio
+import copy
+import functools
+import hashlib
 import logging
 import os
+import time
 import yaml
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
@@ -20,6 +25,84 @@ from .classifier.scorer import Scorer
 
 logger = logging.getLogger(__name__)
 
+# Domains classified in the last hour are answered from memory (duplicate
+# uploads, reruns of the same list)
+RESULT_CACHE_SIZE = 10_000
+RESULT_CACHE_TTL_SECONDS = 3600
+
+# Stage 1 normally answers well within this; when it doesn't, Stage 2 starts
+# alongside it so slow sites don't pay for both stages one after the other
+SPECULATIVE_PLAYWRIGHT_DELAY_SECONDS = 1.5
+
+# Parked and templated domains often extract identical text; their scorer
+# output (including any Vision call) is reused across domains
+CONTENT_CACHE_SIZE = 50_000
+
+
+# .env is read once per process
+_ENV_LOADED = False
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config(config_path: str) -> Dict:
+    """Parse settings.yaml once; callers get their own copy"""
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def _normalize_domain(domain: str) -> str:
+    """Cache key for a domain: case and a leading www. don't change the site"""
+    return domain.strip().lower().removeprefix('www.')
+
+
+def _content_key(features: Dict) -> Optional[bytes]:
+    """
+    Hash of the page text and image URLs the scorer reads, plus whether a
+    screenshot is present, or None when the page has too little text to tell
+    sites apart (the scorer then leans on Vision, which depends on the page
+    itself). The screenshot's content isn't part of the key, so results that
+    used Vision on it must not be stored under it.
+    """
+    if len(features['nav_text']) < 5 and len(features['hero_text']) < 3:
+        return None
+    content = repr((
+        tuple(features['nav_text']),
+        tuple(features['hero_text']),
+        tuple(features['cta_text']),
+        tuple(features['image_urls']),
+        features.get('screenshot_bytes') is not None
+    ))
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+class _TTLCache:
+    """Small LRU cache whose entries expire after a fixed time"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (stored at, value)
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key) -> Optional[Dict]:
+        """Return a copy of a fresh entry (marking it recently used), or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def put(self, key, value: Dict):
+        """Store a copy of value, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
 
 class ClassifierService:
     """
@@ -34,12 +117,14 @@ class ClassifierService:
             base_dir = Path(__file__).parent.parent.parent
             config_path = base_dir / "config" / "settings.yaml"
 
-        # Load config
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+        # Load config (copied: disabling Vision below must not leak into the cache)
+        self.config = copy.deepcopy(_load_config(str(config_path)))
 
         # Load environment
-        load_dotenv()
+        global _ENV_LOADED
+        if not _ENV_LOADED:
+            load_dotenv()
+            _ENV_LOADED = True
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         self.firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
 
@@ -70,6 +155,20 @@ class ClassifierService:
         self._domains_processed_since_browser_start = 0
         self._browser_restart_interval = self.config.get('browser_restart_interval', 200)
 
+        # The worker classifies several domains at once. Browser start and
+        # restart happen under this condition, and a restart waits until no
+        # domain is still using the old browser.
+        self._browser_condition = asyncio.Condition()
+        self._active_domains = 0
+
+        # normalized domain -> result; content hash -> scorer output
+        self._result_cache = _TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+        self._content_cache = _TTLCache(CONTENT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+
+        # normalized domain -> result of the classification currently running,
+        # so a duplicate arriving meanwhile waits for it instead of starting its own
+        self._inflight: Dict[str, asyncio.Future] = {}
+
     async def _ensure_browser(self):
         """Ensure Playwright browser is initialized"""
         if self._browser is None:
@@ -88,7 +187,14 @@ class ClassifierService:
             logger.info("Playwright browser initialized")
 
     async def close(self):
+        """Close Playwright browser and the shared HTTP sessions"""
+        await self._close_browser()
+        await self.http_fetcher.close()
+        await self.scorer.close()
+
+    async def _close_browser(self):
         """Close Playwright browser"""
+        await self.playwright_fetcher.close_contexts()
         if self._browser:
             await self._browser.close()
             self._browser = None
@@ -100,19 +206,58 @@ class ClassifierService:
     async def _restart_browser(self):
         """MEMORY FIX: Restart browser to clear Chromium memory buildup"""
         logger.info(f"Restarting browser after {self._domains_processed_since_browser_start} domains to prevent memory leak")
-        await self.close()
+        await self._close_browser()
         await self._ensure_browser()
 
-    async def classify_domain(self, domain: str) -> Dict:
+    async def classify_domain(self, domain: str, skip_cache: bool = False) -> Dict:
         """
         Classify a single domain using 4-stage pipeline.
 
+        Successful results are cached for RESULT_CACHE_TTL_SECONDS, so a
+        domain seen again within that window skips every fetch and API call.
+        A domain that is already being classified shares that run's result.
+
         Args:
             domain: Domain name to classify
+            skip_cache: Always run the pipeline (the fresh result is still cached)
 
         Returns:
             Classification result dictionary
         """
+        key = _normalize_domain(domain)
+        if not skip_cache:
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                logger.info(f"Cache hit for {domain}: {cached['label']}")
+                now = datetime.utcnow()
+                cached.update(domain=domain, started_at=now, finished_at=now)
+                return cached
+
+        # A cancelled run resolves to None; its waiters then run the pipeline themselves
+        while key in self._inflight:
+            # shield: a waiter being cancelled must not cancel the shared run
+            shared = await asyncio.shield(self._inflight[key])
+            if shared is not None:
+                logger.info(f"Reusing in-flight classification for {domain}")
+                shared = copy.deepcopy(shared)
+                shared['domain'] = domain
+                return shared
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        result = None
+        try:
+            result = await self._classify_domain_uncached(domain)
+            # Errors are usually transient (timeouts, blocked fetches), retry them next time
+            if not result.get('error') and result.get('label') != 'Error':
+                self._result_cache.put(key, result)
+        finally:
+            del self._inflight[key]
+            future.set_result(result)
+        return result
+
+    async def _classify_domain_uncached(self, domain: str) -> Dict:
+        """Run the 4-stage pipeline for a domain"""
         result = {
             'domain': domain,
             'label': 'Error',
@@ -131,23 +276,24 @@ class ClassifierService:
             'finished_at': None
         }
 
+        browser_acquired = False
+        pw_task = None
         try:
-            # Ensure browser is ready for Stage 2/3 if needed
-            await self._ensure_browser()
-
-            # MEMORY FIX: Restart browser periodically to prevent Chromium memory buildup
-            if self._domains_processed_since_browser_start >= self._browser_restart_interval:
-                await self._restart_browser()
+            await self._acquire_browser()
+            browser_acquired = True
 
             # STAGE 1: Try HTTP fetch first (fast, reliable)
             logger.debug(f"Stage 1 (HTTP) for {domain}")
-            http_result = await self.http_fetcher.fetch_domain(domain)
+            http_result, pw_task = await self._fetch_http_with_speculation(domain)
 
             features = None
+            text_score_data = None
             stage_used = None
 
-            if http_result['success'] and len(http_result['nav_text']) >= 5:
+            if http_result is not None and http_result['success'] and len(http_result['nav_text']) >= 5:
                 # HTTP fetch successful with enough text
+                if pw_task is not None:
+                    await self._cancel_task(pw_task)
                 features = {
                     'domain': domain,
                     'nav_text': http_result['nav_text'],
@@ -171,10 +317,10 @@ class ClassifierService:
                     vision_trigger_min <= text_score <= vision_trigger_max):
                     logger.info(f"HTTP text score {text_score:.2f} is borderline, fetching screenshot for Vision validation")
 
-                    # Quick Playwright fetch just for screenshot
-                    pw_result = await self.playwright_fetcher.fetch_domain(domain, self._browser, attempt=0)
-                    if pw_result.get('screenshot_bytes'):
-                        features['screenshot_bytes'] = pw_result['screenshot_bytes']
+                    # Quick Playwright load just for screenshot
+                    screenshot_bytes = await self.playwright_fetcher.screenshot_only(domain, self._browser)
+                    if screenshot_bytes:
+                        features['screenshot_bytes'] = screenshot_bytes
                         logger.debug(f"Screenshot captured for Vision validation: {len(features['screenshot_bytes'])} bytes")
                         stage_used = 'http+vision'
                     else:
@@ -186,9 +332,15 @@ class ClassifierService:
 
             else:
                 # STAGE 2: HTTP failed or insufficient text, try Playwright
-                logger.info(f"Stage 1 INSUFFICIENT for {domain}, trying Stage 2 (Playwright)")
+                if http_result is None:
+                    logger.info(f"Stage 2 (Playwright) finished before Stage 1 for {domain}")
+                else:
+                    logger.info(f"Stage 1 INSUFFICIENT for {domain}, trying Stage 2 (Playwright)")
 
-                pw_result = await self.playwright_fetcher.fetch_with_retries(domain, self._browser)
+                if pw_task is not None:
+                    pw_result = await pw_task
+                else:
+                    pw_result = await self.playwright_fetcher.fetch_with_retries(domain, self._browser)
 
                 if pw_result['success'] or pw_result.get('screenshot_bytes'):
                     features = {
@@ -237,8 +389,9 @@ class ClassifierService:
                 result['error'] = 'All fetch stages failed'
                 return result
 
-            # Calculate text score
-            text_score_data = self.feature_extractor.calculate_text_score(features)
+            # Calculate text score (Stage 1 already did; a screenshot doesn't change it)
+            if text_score_data is None:
+                text_score_data = self.feature_extractor.calculate_text_score(features)
 
             # Store evidence
             result['nav_count'] = len(features['nav_text'])
@@ -246,7 +399,20 @@ class ClassifierService:
             result['stage_used'] = stage_used
 
             # STAGE 4: Classify (may use Vision if text extraction failed)
-            classification = await self.scorer.classify(features, text_score_data)
+            content_key = _content_key(features)
+            cached = self._content_cache.get(content_key) if content_key else None
+            if cached is not None:
+                logger.info(f"Content cache hit for {domain}: same page content as {cached['domain']}")
+                classification = {**cached, 'domain': domain}
+            else:
+                classification = await self.scorer.classify(features, text_score_data)
+                # A screenshot Vision score is specific to this site, even on a shared template
+                used_screenshot = (
+                    features.get('screenshot_bytes') is not None and
+                    classification.get('vision_score') is not None
+                )
+                if content_key and not used_screenshot:
+                    self._content_cache.put(content_key, classification)
 
             # Update result
             result.update(classification)
@@ -268,12 +434,77 @@ class ClassifierService:
             result['error'] = str(e)[:500]
 
         finally:
+            # Speculative Playwright fetch that ended up unused (or an error above)
+            if pw_task is not None and not pw_task.done():
+                await self._cancel_task(pw_task)
             result['finished_at'] = datetime.utcnow()
-            # MEMORY FIX: Increment domain counter for browser restart tracking
-            self._domains_processed_since_browser_start += 1
+            if browser_acquired:
+                await self._release_browser()
 
         return result
 
+    async def _fetch_http_with_speculation(self, domain: str) -> Tuple[Optional[Dict], Optional[asyncio.Task]]:
+        """
+        Run Stage 1, starting Stage 2 alongside it if Stage 1 is slow.
+
+        Returns:
+            (http_result, pw_task): http_result is None when Playwright succeeded
+            first (Stage 1 is then cancelled); pw_task is the speculative
+            Playwright fetch, or None if Stage 1 answered in time
+        """
+        http_task = asyncio.create_task(self.http_fetcher.fetch_domain(domain))
+        pw_task = None
+        try:
+            done, _ = await asyncio.wait({http_task}, timeout=SPECULATIVE_PLAYWRIGHT_DELAY_SECONDS)
+            if not done:
+                logger.debug(f"Stage 1 slow for {domain}, starting Stage 2 (Playwright) alongside")
+                pw_task = asyncio.create_task(
+                    self.playwright_fetcher.fetch_with_retries(domain, self._browser)
+                )
+                done, _ = await asyncio.wait({http_task, pw_task}, return_when=asyncio.FIRST_COMPLETED)
+                if http_task not in done and pw_task.result()['success']:
+                    await self._cancel_task(http_task)
+                    return None, pw_task
+
+            return await http_task, pw_task
+
+        except BaseException:
+            for task in (http_task, pw_task):
+                if task is not None:
+                    await self._cancel_task(task)
+            raise
+
+    @staticmethod
+    async def _cancel_task(task: asyncio.Task):
+        """Cancel a task and wait for it to finish cleaning up"""
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _acquire_browser(self):
+        """Make sure the browser is ready (restarting it when due) and register a domain using it"""
+        async with self._browser_condition:
+            # MEMORY FIX: Restart browser periodically to prevent Chromium memory buildup.
+            # Let domains still using the current browser finish first.
+            if self._domains_processed_since_browser_start >= self._browser_restart_interval:
+                await self._browser_condition.wait_for(
+                    lambda: self._active_domains == 0 or
+                    self._domains_processed_since_browser_start < self._browser_restart_interval
+                )
+                if self._domains_processed_since_browser_start >= self._browser_restart_interval:
+                    await self._restart_browser()
+
+            # Ensure browser is ready for Stage 2/3 if needed
+            await self._ensure_browser()
+            self._active_domains += 1
+
+    async def _release_browser(self):
+        """Unregister a finished domain and wake a pending browser restart"""
+        async with self._browser_condition:
+            self._active_domains -= 1
+            # MEMORY FIX: Increment domain counter for browser restart tracking
+            self._domains_processed_since_browser_start += 1
+            self._browser_condition.notify_all()
+
 
 # Global classifier instance (singleton)
 _classifier_instance: Optional[ClassifierService] = None
@@ -0,0 +1,68 @@
+"""
+Aggregate statistics for a classification run
+"""
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from ..models.models import Run, Record, RecordStatus, Label
+from ..schemas.schemas import RunStatistics
+
+
+def _duration_seconds(db: Session, start, end):
+    """SQL expression for the number of seconds between two datetime columns"""
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.extract("epoch", end - start)
+
+
+def compute_run_statistics(db: Session, run: Run) -> RunStatistics:
+    """
+    Compute statistics for a run entirely in SQL.
+
+    Three aggregate queries (status counts and averages, label counts,
+    stage counts); no Record rows are loaded.
+
+    Args:
+        db: Database session
+        run: The run to summarize
+
+    Returns:
+        RunStatistics for the run
+    """
+    # Status counts and averages in a single pass over the run's records
+    # (AVG ignores NULLs, so unscored/unfinished records drop out)
+    completed_records, error_records, average_confidence, average_processing_time = db.query(
+        func.count(case((Record.status == RecordStatus.COMPLETED, 1))),
+        func.count(case((Record.status == RecordStatus.ERROR, 1))),
+        func.avg(Record.confidence),
+        func.avg(_duration_seconds(db, Record.started_at, Record.processed_at))
+    ).filter(Record.run_id == run.id).one()
+
+    # Count by label
+    label_counts = dict(
+        db.query(Record.label, func.count(Record.id))
+        .filter(Record.run_id == run.id, Record.label.isnot(None))
+        .group_by(Record.label)
+        .all()
+    )
+    label_distribution = {
+        label.value: label_counts[label] for label in Label if label_counts.get(label)
+    }
+
+    # Count by stage
+    stage_distribution = dict(
+        db.query(Record.stage_used, func.count(Record.id))
+        .filter(Record.run_id == run.id, Record.stage_used.isnot(None), Record.stage_used != '')
+        .group_by(Record.stage_used)
+        .all()
+    )
+
+    return RunStatistics(
+        total_records=run.total_records,
+        completed_records=completed_records,
+        error_records=error_records,
+        label_distribution=label_distribution,
+        stage_distribution=stage_distribution,
+        average_confidence=average_confidence,
+        average_processing_time_seconds=average_processing_time
+    )
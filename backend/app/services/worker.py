@@ -3,18 +3,37 @@ Background worker for processing classification runs
 """
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Optional
+from typing import Deque, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, raiseload
 
 from ..models.database import SessionLocal
 from ..models.models import Run, Record, RunStatus, RecordStatus, Label
 from ..config import settings
-from .classifier_service import get_classifier
+from .classifier_service import get_classifier, shutdown_classifier
 
 logger = logging.getLogger(__name__)
 
+# Pending records are read this many at a time and then claimed one by one
+PENDING_BATCH_SIZE = 200
+
+# Worker whose run() loop is active; woken by notify_worker()
+_active_worker: Optional["Worker"] = None
+
+
+def notify_worker():
+    """
+    Wake the background worker now instead of at its next poll.
+
+    Safe to call from API handlers running in the threadpool.
+    """
+    worker = _active_worker
+    if worker is not None:
+        worker.notify()
+
 
 class Worker:
     """
@@ -26,10 +45,22 @@ class Worker:
         self.should_stop = False
         self.current_run_id: Optional[int] = None
         self.current_domain: Optional[str] = None
+        # (id, domain) of pending records of the current run not yet claimed
+        self._pending_records: Deque[Tuple[int, str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def notify(self):
+        """Wake the worker loop (thread-safe)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
 
     async def run(self):
         """Main worker loop"""
+        global _active_worker
         self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        _active_worker = self
         logger.info("Background worker started")
 
         try:
@@ -37,12 +68,23 @@ class Worker:
                 # Poll for pending work
                 await self._process_next_run()
 
-                # Wait before next poll
-                await asyncio.sleep(settings.WORKER_POLL_INTERVAL_SECONDS)
+                # Wait before next poll, unless new work is queued meanwhile
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        timeout=settings.WORKER_POLL_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
 
         except Exception as e:
             logger.error(f"Worker error: {e}", exc_info=True)
         finally:
+            if _active_worker is self:
+                _active_worker = None
+            # Release the browser and pooled HTTP connections
+            await shutdown_classifier()
             self.is_running = False
             logger.info("Background worker stopped")
 
@@ -50,6 +92,7 @@ class Worker:
         """Stop worker gracefully"""
         logger.info("Stopping background worker...")
         self.should_stop = True
+        self._wakeup.set()
 
         # Wait for current domain to finish (max 60 seconds)
         for _ in range(60):
@@ -83,54 +126,31 @@ class Worker:
         finally:
             db.close()  # Close initial session
 
-        # Process pending records - each with its own session
+        # Process pending records: up to WORKER_CONCURRENCY domains are in
+        # flight at once, each slot claiming the next record as it frees up
+        self._pending_records.clear()
         try:
-            while not self.should_stop:
-                # CRITICAL FIX: New session for each record
-                db_record = SessionLocal()
-                try:
-                    # Get next pending record
-                    record = db_record.query(Record).filter(
-                        Record.run_id == run_id,
-                        Record.status == RecordStatus.PENDING
-                    ).first()
-
-                    if not record:
-                        # No more pending records, mark run as completed
-                        db_final = SessionLocal()
-                        try:
-                            run = db_final.query(Run).get(run_id)
-                            if run:
-                                run.status = RunStatus.COMPLETED
-                                run.completed_at = datetime.utcnow()
-                                db_final.commit()
-                                logger.info(f"Run {run_id} completed")
-                        finally:
-                            db_final.close()
-                        break
-
-                    # Process record with its own session
-                    await self._process_record(record, db_record)
-                    db_record.commit()
-
-                except Exception as e:
-                    logger.error(f"Error processing record: {e}", exc_info=True)
-                    db_record.rollback()
-                finally:
-                    db_record.close()  # Always close record session
+            slots = max(1, settings.WORKER_CONCURRENCY)
+            results = await asyncio.gather(
+                *(self._process_run_records(run_id) for _ in range(slots)),
+                return_exceptions=True
+            )
+            for outcome in results:
+                if isinstance(outcome, Exception):
+                    raise outcome
 
-                # Update run progress (separate session to avoid long locks)
-                db_progress = SessionLocal()
+            if not self.should_stop:
+                # No more pending records, mark run as completed
+                db_final = SessionLocal()
                 try:
-                    run = db_progress.query(Run).get(run_id)
+                    run = db_final.query(Run).get(run_id)
                     if run:
-                        run.processed_records = db_progress.query(Record).filter(
-                            Record.run_id == run_id,
-                            Record.status.in_([RecordStatus.COMPLETED, RecordStatus.ERROR])
-                        ).count()
-                        db_progress.commit()
+                        run.status = RunStatus.COMPLETED
+                        run.completed_at = datetime.utcnow()
+                        db_final.commit()
+                        logger.info(f"Run {run_id} completed")
                 finally:
-                    db_progress.close()
+                    db_final.close()
 
         except Exception as e:
             logger.error(f"Error processing run: {e}", exc_info=True)
@@ -147,16 +167,61 @@ class Worker:
         finally:
             self.current_run_id = None
             self.current_domain = None
+            self._pending_records.clear()
+
+    async def _process_run_records(self, run_id: int):
+        """Process pending records of a run one after another until none are left"""
+        while not self.should_stop:
+            claimed = self._claim_next_record(run_id)
+            if claimed is None:
+                return
+
+            record_id, domain = claimed
+            await self._process_record(record_id, domain)
+
+    def _claim_next_record(self, run_id: int) -> Optional[Tuple[int, str]]:
+        """
+        Mark the next pending record of a run as processing and return (id, domain).
 
-    async def _process_record(self, record: Record, db: Session):
-        """Process a single record"""
-        self.current_domain = record.domain
-        logger.info(f"Processing record {record.id}: {record.domain}")
+        Pending records are read PENDING_BATCH_SIZE at a time; each one is then
+        claimed with a conditional UPDATE and committed, so a restart resumes
+        from the records still pending. A record that is no longer pending
+        (deleted, or claimed elsewhere) is skipped.
 
-        # Mark record as processing
-        record.status = RecordStatus.PROCESSING
-        record.started_at = datetime.utcnow()
-        db.commit()
+        Runs without awaiting, so concurrent slots on the event loop can never
+        claim the same record.
+        """
+        db = SessionLocal()
+        try:
+            while True:
+                if not self._pending_records:
+                    # Claimed records are no longer pending, so no cursor is needed
+                    self._pending_records.extend(
+                        db.query(Record.id, Record.domain).filter(
+                            Record.run_id == run_id,
+                            Record.status == RecordStatus.PENDING
+                        ).limit(PENDING_BATCH_SIZE).all()
+                    )
+                    if not self._pending_records:
+                        return None
+
+                record_id, domain = self._pending_records.popleft()
+                claimed = db.execute(
+                    update(Record)
+                    .where(Record.id == record_id, Record.status == RecordStatus.PENDING)
+                    .values(status=RecordStatus.PROCESSING, started_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return record_id, domain
+        finally:
+            db.close()
+
+    async def _process_record(self, record_id: int, domain: str):
+        """Classify a claimed record and store the result in its own session"""
+        self.current_domain = domain
+        logger.info(f"Processing record {record_id}: {domain}")
 
         try:
             # Get classifier
@@ -166,18 +231,29 @@ class Worker:
             # This prevents worker from hanging forever on a single domain
             try:
                 result = await asyncio.wait_for(
-                    classifier.classify_domain(record.domain),
+                    classifier.classify_domain(domain),
                     timeout=120.0  # 2 minute maximum per domain
                 )
             except asyncio.TimeoutError:
-                logger.error(f"Classification timeout for {record.domain} after 120 seconds")
+                logger.error(f"Classification timeout for {domain} after 120 seconds")
                 result = {
-                    'domain': record.domain,
+                    'domain': domain,
                     'label': 'Error',
                     'confidence': 0.0,
                     'error': 'Classification timeout after 120 seconds',
                     'finished_at': datetime.utcnow()
                 }
+        except Exception as e:
+            logger.error(f"Error processing record {record_id}: {e}", exc_info=True)
+            result = {'label': 'Error', 'error': str(e)[:500]}
+
+        # Classification can take minutes; write the result in a fresh session
+        db = SessionLocal()
+        try:
+            record = db.query(Record).options(raiseload(Record.overrides)).get(record_id)
+            if record is None:
+                # Run was deleted while the domain was being classified
+                return
 
             # Update record with results
             record.label = self._map_label(result.get('label'))
@@ -195,6 +271,13 @@ class Worker:
             record.status = RecordStatus.COMPLETED if not result.get('error') else RecordStatus.ERROR
             record.processed_at = datetime.utcnow()
 
+            # Count the record towards run progress in the same transaction
+            db.execute(
+                update(Run)
+                .where(Run.id == record.run_id)
+                .values(processed_records=func.coalesce(Run.processed_records, 0) + 1)
+            )
+
             # Commit record updates
             db.commit()
 
@@ -204,25 +287,15 @@ class Worker:
                 f"Record {record.id} completed: {record.label} "
                 f"(confidence: {conf_str})"
             )
-
         except Exception as e:
-            logger.error(f"Error processing record {record.id}: {e}", exc_info=True)
-            record.status = RecordStatus.ERROR
-            record.error = str(e)[:500]
-            record.processed_at = datetime.utcnow()
-            db.commit()
+            logger.error(f"Error saving record {record_id}: {e}", exc_info=True)
+            db.rollback()
+        finally:
+            db.close()
 
     def _map_label(self, label_str: Optional[str]) -> Label:
-        """Map label string to Label enum"""
-        if not label_str:
+        """Map label string to Label enum (the enum values are the scorer's label strings)"""
+        try:
+            return Label(label_str)
+        except ValueError:
             return Label.ERROR
-
-        label_map = {
-            'Pure Bodywear': Label.PURE_BODYWEAR,
-            'Bodywear Leaning': Label.BODYWEAR_LEANING,
-            'Needs Review': Label.NEEDS_REVIEW,
-            'Generalist': Label.GENERALIST,
-            'Error': Label.ERROR
-        }
-
-        return label_map.get(label_str, Label.ERROR)
@@ -89,4 +89,5 @@ export interface PaginatedResponse<T> {
   total: number
   page: number
   page_size: number
+  next_cursor?: string | null
 }